@@ -0,0 +1,24 @@
+"""run scheduling columns"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002_run_scheduling"
+down_revision = "0001_init"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("projects", sa.Column("priority", sa.Integer, nullable=True))
+    op.add_column("projects", sa.Column("run_requested_at", sa.DateTime, nullable=True))
+    op.add_column("projects", sa.Column("started_at", sa.DateTime, nullable=True))
+    op.add_column("projects", sa.Column("finished_at", sa.DateTime, nullable=True))
+    op.create_index("ix_projects_run_queue", "projects", ["status", "priority", "run_requested_at"])
+
+
+def downgrade():
+    op.drop_index("ix_projects_run_queue", table_name="projects")
+    op.drop_column("projects", "finished_at")
+    op.drop_column("projects", "started_at")
+    op.drop_column("projects", "run_requested_at")
+    op.drop_column("projects", "priority")
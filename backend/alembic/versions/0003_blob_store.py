@@ -0,0 +1,30 @@
+"""content-addressed blob store"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003_blob_store"
+down_revision = "0002_run_scheduling"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "blobs",
+        sa.Column("digest", sa.String(64), primary_key=True),
+        sa.Column("size", sa.BigInteger, nullable=False),
+        sa.Column("compression", sa.String, nullable=True),
+        sa.Column("refcount", sa.Integer, nullable=False, server_default="0"),
+        sa.Column("last_referenced_at", sa.DateTime, nullable=True),
+        sa.Column("created_at", sa.DateTime, nullable=True),
+    )
+    op.add_column("exports", sa.Column("blob_digest", sa.String(64), nullable=True))
+    op.add_column("papers", sa.Column("pdf_digest", sa.String(64), nullable=True))
+    op.add_column("papers", sa.Column("text_digest", sa.String(64), nullable=True))
+
+
+def downgrade():
+    op.drop_column("papers", "text_digest")
+    op.drop_column("papers", "pdf_digest")
+    op.drop_column("exports", "blob_digest")
+    op.drop_table("blobs")
@@ -0,0 +1,39 @@
+"""jsonb paper metadata and full-text search"""
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+revision = "0004_paper_search"
+down_revision = "0003_blob_store"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.alter_column("papers", "authors", type_=postgresql.JSONB, postgresql_using="authors::jsonb")
+    op.alter_column("papers", "categories", type_=postgresql.JSONB, postgresql_using="categories::jsonb")
+    op.create_index(
+        "ix_papers_authors", "papers", ["authors"], postgresql_using="gin", postgresql_ops={"authors": "jsonb_path_ops"}
+    )
+    op.create_index(
+        "ix_papers_categories",
+        "papers",
+        ["categories"],
+        postgresql_using="gin",
+        postgresql_ops={"categories": "jsonb_path_ops"},
+    )
+    op.execute(
+        "ALTER TABLE papers ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+        "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+        "setweight(to_tsvector('english', coalesce(abstract, '')), 'B')"
+        ") STORED"
+    )
+    op.create_index("ix_papers_search_vector", "papers", ["search_vector"], postgresql_using="gin")
+
+
+def downgrade():
+    op.drop_index("ix_papers_search_vector", table_name="papers")
+    op.drop_column("papers", "search_vector")
+    op.drop_index("ix_papers_categories", table_name="papers")
+    op.drop_index("ix_papers_authors", table_name="papers")
+    op.alter_column("papers", "categories", type_=postgresql.JSON, postgresql_using="categories::json")
+    op.alter_column("papers", "authors", type_=postgresql.JSON, postgresql_using="authors::json")
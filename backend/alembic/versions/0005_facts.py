@@ -0,0 +1,89 @@
+"""cross-paper facts table"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+# The same normalisation as ``add_facts``, so backfilled rows match new ones.
+from services.facts import extract_facts
+
+revision = "0005_facts"
+down_revision = "0004_paper_search"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "facts",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("project_id", sa.Integer, sa.ForeignKey("projects.id"), nullable=False),
+        sa.Column("paper_id", sa.Integer, sa.ForeignKey("papers.id"), nullable=False),
+        sa.Column("analysis_id", sa.Integer, sa.ForeignKey("analyses.id"), nullable=False),
+        sa.Column("dataset", sa.String, nullable=True),
+        sa.Column("metric", sa.String, nullable=True),
+        sa.Column("value", sa.String, nullable=True),
+        sa.Column("value_numeric", sa.Float, nullable=True),
+        sa.Column("setting", sa.String, nullable=True),
+        sa.Column("created_at", sa.DateTime, nullable=True),
+    )
+    op.create_index("ix_facts_paper_id", "facts", ["paper_id"])
+    op.create_index("ix_facts_analysis_id", "facts", ["analysis_id"])
+    op.create_index("ix_facts_project_dataset_metric", "facts", ["project_id", "dataset", "metric"])
+    op.create_index("ix_facts_dataset_metric", "facts", ["dataset", "metric"])
+    _backfill_facts()
+
+
+def _backfill_facts(page_size: int = 1000):
+    """Facts of the analyses written before the table existed."""
+    analyses = sa.table(
+        "analyses",
+        sa.column("id", sa.Integer),
+        sa.column("project_id", sa.Integer),
+        sa.column("paper_id", sa.Integer),
+        sa.column("extracted", sa.JSON),
+    )
+    facts = sa.table(
+        "facts",
+        sa.column("project_id", sa.Integer),
+        sa.column("paper_id", sa.Integer),
+        sa.column("analysis_id", sa.Integer),
+        sa.column("dataset", sa.String),
+        sa.column("metric", sa.String),
+        sa.column("value", sa.String),
+        sa.column("value_numeric", sa.Float),
+        sa.column("setting", sa.String),
+        sa.column("created_at", sa.DateTime),
+    )
+    bind = op.get_bind()
+    now = datetime.utcnow()
+    last_id = 0
+    while True:
+        page = bind.execute(
+            sa.select(analyses).where(analyses.c.id > last_id).order_by(analyses.c.id).limit(page_size)
+        ).all()
+        if not page:
+            return
+        rows = [
+            {
+                "project_id": analysis.project_id,
+                "paper_id": analysis.paper_id,
+                "analysis_id": analysis.id,
+                "dataset": None,
+                "metric": None,
+                "value": None,
+                "value_numeric": None,
+                "setting": None,
+                "created_at": now,
+                **fact,
+            }
+            for analysis in page
+            for fact in extract_facts(analysis.extracted)
+        ]
+        if rows:
+            op.bulk_insert(facts, rows)
+        last_id = page[-1].id
+
+
+def downgrade():
+    op.drop_table("facts")
@@ -0,0 +1,20 @@
+"""incremental project refresh"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006_incremental_refresh"
+down_revision = "0005_facts"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("projects", sa.Column("run_mode", sa.String, nullable=True, server_default="full"))
+    op.add_column("projects", sa.Column("last_success_at", sa.DateTime, nullable=True))
+    # Projects that already completed can be refreshed from their last finish.
+    op.execute("UPDATE projects SET last_success_at = finished_at WHERE status = 'completed'")
+
+
+def downgrade():
+    op.drop_column("projects", "last_success_at")
+    op.drop_column("projects", "run_mode")
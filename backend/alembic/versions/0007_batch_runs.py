@@ -0,0 +1,16 @@
+"""batch runs take one run slot"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0007_batch_runs"
+down_revision = "0006_incremental_refresh"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("projects", sa.Column("batch_id", sa.String, nullable=True))
+
+
+def downgrade():
+    op.drop_column("projects", "batch_id")
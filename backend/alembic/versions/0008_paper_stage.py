@@ -0,0 +1,16 @@
+"""per-paper stage of the current run"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0008_paper_stage"
+down_revision = "0007_batch_runs"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("papers", sa.Column("stage", sa.String, nullable=True))
+
+
+def downgrade():
+    op.drop_column("papers", "stage")
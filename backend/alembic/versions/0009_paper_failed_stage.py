@@ -0,0 +1,18 @@
+"""per-paper failed stage"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0009_paper_failed_stage"
+down_revision = "0008_paper_stage"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("papers", sa.Column("failed_stage", sa.String, nullable=True))
+    # Earlier runs recorded every paper failure as a failed download.
+    op.execute("UPDATE papers SET failed_stage = 'DOWNLOAD' WHERE download_status = 'failed'")
+
+
+def downgrade():
+    op.drop_column("papers", "failed_stage")
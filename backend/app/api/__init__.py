@@ -1,3 +1,3 @@
-from api import auth, chat, projects, ws
+from api import auth, chat, metrics, papers, projects, ws
 
-__all__ = ["auth", "chat", "projects", "ws"]
+__all__ = ["auth", "chat", "metrics", "papers", "projects", "ws"]
@@ -1,20 +1,123 @@
+import json
+from functools import lru_cache
+
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 
 from api.deps import get_current_user
+from core.config import get_settings
 from schemas.chat import ChatRequest, ChatResponse
-from services.coze import chat_with_coze
+from services.coze import chat_with_coze, coze_configured, stream_chat_with_coze
 
 router = APIRouter(tags=["chat"])
 
 
+@lru_cache()
+def _chat_cache():
+    """The semantic cache, or None; numpy and the embedder load only when it is enabled."""
+    if not get_settings().chat_cache_enabled:
+        return None
+    from services.chat_cache import build_chat_cache
+
+    return build_chat_cache()
+
+
+def _cache_scope(req: ChatRequest) -> str:
+    return req.model or get_settings().coze_model
+
+
+async def _cached_reply(req: ChatRequest, messages: list[dict]):
+    chat_cache = _chat_cache()
+    if chat_cache is None or not coze_configured():
+        return None
+    return await run_in_threadpool(chat_cache.lookup, messages, _cache_scope(req))
+
+
+async def _cache_reply(req: ChatRequest, messages: list[dict], reply: str, raw: dict | None):
+    chat_cache = _chat_cache()
+    if chat_cache is None or not coze_configured():
+        return
+    await run_in_threadpool(chat_cache.store, messages, _cache_scope(req), reply, raw)
+
+
 @router.post("/chat", response_model=ChatResponse)
 async def chat(req: ChatRequest, _user=Depends(get_current_user)):
+    messages = [message.dict() for message in req.messages]
+    cached = await _cached_reply(req, messages)
+    if cached is not None:
+        return ChatResponse(reply=cached.reply, raw=cached.raw, cached=True)
     try:
         payload = await chat_with_coze(
-            [message.dict() for message in req.messages],
+            messages,
             req.model,
             req.temperature,
         )
     except Exception as exc:  # noqa: BLE001
         raise HTTPException(status_code=502, detail=str(exc)) from exc
+    await _cache_reply(req, messages, payload["reply"], payload["raw"])
     return ChatResponse(**payload)
+
+
+@router.get("/chat/cache")
+def chat_cache_stats(_user=Depends(get_current_user)):
+    chat_cache = _chat_cache()
+    if chat_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **chat_cache.stats()}
+
+
+def _sse(data: dict | str, event: str | None = None) -> str:
+    body = data if isinstance(data, str) else json.dumps(data, ensure_ascii=False)
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {body}\n\n"
+
+
+@router.post("/chat/stream")
+async def chat_stream(req: ChatRequest, _user=Depends(get_current_user)):
+    messages = [message.dict() for message in req.messages]
+    cached = await _cached_reply(req, messages)
+    if cached is not None:
+
+        async def cached_events():
+            yield _sse({"delta": cached.reply, "cached": True})
+            yield _sse("[DONE]")
+
+        return StreamingResponse(
+            cached_events(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    deltas = stream_chat_with_coze(
+        messages,
+        req.model,
+        req.temperature,
+    )
+    # Wait for the first token before answering so upstream failures still map to a 502.
+    try:
+        first = await deltas.__anext__()
+    except StopAsyncIteration:
+        first = None
+    except Exception as exc:  # noqa: BLE001
+        raise HTTPException(status_code=502, detail=str(exc)) from exc
+
+    async def events():
+        if first is not None:
+            reply = [first]
+            yield _sse({"delta": first})
+            try:
+                async for delta in deltas:
+                    reply.append(delta)
+                    yield _sse({"delta": delta})
+            except Exception as exc:  # noqa: BLE001
+                yield _sse({"detail": str(exc)}, event="error")
+                return
+            await _cache_reply(req, messages, "".join(reply), None)
+        yield _sse("[DONE]")
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,25 @@
+from fastapi import APIRouter, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+
+from core.config import get_settings
+from infrastructure.metrics import CeleryQueueCollector, build_registry
+from infrastructure.pubsub import redis_client
+from services.scheduler import PRIORITY_STEPS
+
+router = APIRouter(tags=["metrics"])
+
+_settings = get_settings()
+# Queue depth is global, so only the API exports it.
+_collectors = []
+if redis_client is not None and not _settings.task_always_eager:
+    _collectors.append(
+        CeleryQueueCollector(
+            redis_client, ["celery", _settings.pipeline_io_queue, _settings.pipeline_cpu_queue], PRIORITY_STEPS
+        )
+    )
+registry = build_registry(*_collectors)
+
+
+@router.get("/metrics", include_in_schema=False)
+def metrics():
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
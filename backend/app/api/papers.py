@@ -0,0 +1,28 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.orm import Session
+
+from api.deps import get_current_user
+from db.session import get_db
+from schemas import PaperSearchHit, PaperSearchPage
+from services.paper_search import InvalidCursor, search_papers
+
+router = APIRouter(prefix="/papers", tags=["papers"])
+
+
+@router.get("/search", response_model=PaperSearchPage, response_class=ORJSONResponse)
+def search(
+    q: str | None = None,
+    category: str | None = None,
+    author: str | None = None,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: str | None = None,
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    try:
+        hits, next_cursor = search_papers(db, current_user.id, q, category, author, limit, cursor)
+    except InvalidCursor as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    items = [PaperSearchHit.from_orm(paper).copy(update={"rank": rank}) for paper, rank in hits]
+    return PaperSearchPage(items=items, next_cursor=next_cursor)
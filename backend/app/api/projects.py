@@ -1,11 +1,28 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
 
 from api.deps import get_current_user
+from api.responses import rows_response, schema_columns
+from core.config import get_settings
 from db.session import get_db
 from models import Export, Paper, Project
-from schemas import ProjectCreate, ProjectOut, PaperOut, ExportOut
-from workers.celery_app import run_pipeline_task
+from schemas import (
+    BatchRunOut,
+    BatchRunRequest,
+    BatchSearchOut,
+    ComparisonRow,
+    ExportOut,
+    FactOut,
+    PaperOut,
+    ProjectCreate,
+    ProjectOut,
+)
+from services.batch import plan_searches
+from services.blobs import collect_garbage, project_blob_digests, read_blob, release_blobs
+from services.facts import compare, facts_for
+from services.pipeline import FULL, RUN_MODES
+from services.scheduler import ACTIVE_STATUSES, LANES, PENDING, queue_status, request_batch_run, request_run
 
 router = APIRouter(prefix="/projects", tags=["projects"])
 
@@ -28,14 +45,15 @@ def create_project(payload: ProjectCreate, db: Session = Depends(get_db), curren
     return project
 
 
-@router.get("", response_model=list[ProjectOut])
+@router.get("", response_model=list[ProjectOut], response_class=ORJSONResponse)
 def list_projects(db: Session = Depends(get_db), current_user=Depends(get_current_user)):
-    return (
-        db.query(Project)
+    rows = (
+        db.query(*schema_columns(ProjectOut, Project))
         .filter(Project.user_id == current_user.id)
         .order_by(Project.created_at.desc())
         .all()
     )
+    return rows_response(rows, ProjectOut)
 
 
 @router.get("/{project_id}", response_model=ProjectOut)
@@ -51,18 +69,71 @@ def delete_project(project_id: int, db: Session = Depends(get_db), current_user=
     project = db.query(Project).filter(Project.id == project_id, Project.user_id == current_user.id).first()
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
+    digests = project_blob_digests(project)
+    release_blobs(db, digests)
     db.delete(project)
     db.commit()
+    collect_garbage(db, digests)
     return {"success": True}
 
 
 @router.post("/{project_id}/run")
-def run_pipeline(project_id: int, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
+def run_pipeline(
+    project_id: int,
+    lane: str | None = None,
+    mode: str = FULL,
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
     project = db.query(Project).filter(Project.id == project_id, Project.user_id == current_user.id).first()
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
-    task = run_pipeline_task.delay(project.id)
-    return {"task_id": task.id}
+    if lane is not None and lane not in LANES:
+        raise HTTPException(status_code=422, detail=f"lane must be one of {sorted(LANES)}")
+    if mode not in RUN_MODES:
+        raise HTTPException(status_code=422, detail=f"mode must be one of {list(RUN_MODES)}")
+    if project.status in ACTIVE_STATUSES or project.status == PENDING:
+        raise HTTPException(status_code=409, detail="Project run already in progress")
+    task_id = request_run(db, project, lane, mode)
+    db.refresh(project)
+    return {"task_id": task_id, "status": project.status, **queue_status(db, project)}
+
+
+@router.post("/run-batch", response_model=BatchRunOut)
+def run_batch(payload: BatchRunRequest, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
+    """Run many projects as one job: shared searches, each unique paper processed once."""
+    if payload.lane is not None and payload.lane not in LANES:
+        raise HTTPException(status_code=422, detail=f"lane must be one of {sorted(LANES)}")
+    if payload.mode not in RUN_MODES:
+        raise HTTPException(status_code=422, detail=f"mode must be one of {list(RUN_MODES)}")
+    project_ids = list(dict.fromkeys(payload.project_ids))
+    settings = get_settings()
+    if len(project_ids) > settings.max_batch_projects:
+        raise HTTPException(status_code=422, detail=f"A batch takes at most {settings.max_batch_projects} projects")
+    projects = (
+        db.query(Project)
+        .filter(Project.id.in_(project_ids), Project.user_id == current_user.id)
+        .order_by(Project.id)
+        .all()
+    )
+    if len(projects) != len(project_ids):
+        raise HTTPException(status_code=404, detail="Project not found")
+    if any(project.status in ACTIVE_STATUSES or project.status == PENDING for project in projects):
+        raise HTTPException(status_code=409, detail="Project run already in progress")
+    for project in projects:
+        project.run_mode = payload.mode
+    searches = [
+        BatchSearchOut(
+            query=group.query,
+            start=group.start,
+            max_results=group.end - group.start,
+            project_ids=list(group.windows),
+        )
+        for group in plan_searches(projects)
+    ]
+    task_id = request_batch_run(db, projects, payload.lane, payload.mode)
+    db.refresh(projects[0])
+    return BatchRunOut(task_id=task_id, status=projects[0].status, project_ids=project_ids, searches=searches)
 
 
 @router.get("/{project_id}/status")
@@ -70,15 +141,21 @@ def project_status(project_id: int, db: Session = Depends(get_db), current_user=
     project = db.query(Project).filter(Project.id == project_id, Project.user_id == current_user.id).first()
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
-    return {"status": project.status, "stage": project.stage, "progress": project.progress}
+    return {
+        "status": project.status,
+        "stage": project.stage,
+        "progress": project.progress,
+        **queue_status(db, project),
+    }
 
 
-@router.get("/{project_id}/papers", response_model=list[PaperOut])
+@router.get("/{project_id}/papers", response_model=list[PaperOut], response_class=ORJSONResponse)
 def project_papers(project_id: int, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
     project = db.query(Project).filter(Project.id == project_id, Project.user_id == current_user.id).first()
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
-    return db.query(Paper).filter(Paper.project_id == project.id).all()
+    rows = db.query(*schema_columns(PaperOut, Paper)).filter(Paper.project_id == project.id).order_by(Paper.id).all()
+    return rows_response(rows, PaperOut)
 
 
 @router.get("/{project_id}/exports", response_model=list[ExportOut])
@@ -87,3 +164,65 @@ def project_exports(project_id: int, db: Session = Depends(get_db), current_user
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     return db.query(Export).filter(Export.project_id == project.id).all()
+
+
+EXPORT_MEDIA_TYPES = {"md": ("text/markdown; charset=utf-8", "md"), "profile": ("application/json", "json")}
+
+
+@router.get("/{project_id}/exports/{export_id}/download")
+def download_export(
+    project_id: int, export_id: int, db: Session = Depends(get_db), current_user=Depends(get_current_user)
+):
+    project = db.query(Project).filter(Project.id == project_id, Project.user_id == current_user.id).first()
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    export = db.query(Export).filter(Export.id == export_id, Export.project_id == project.id).first()
+    if not export or not export.blob_digest:
+        raise HTTPException(status_code=404, detail="Export not found")
+    try:
+        content = read_blob(db, export.blob_digest)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Export file missing")
+    media_type, extension = EXPORT_MEDIA_TYPES.get(export.format, ("application/octet-stream", export.format))
+    filename = f"project-{project.id}-export-{export.id}.{extension}"
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    return Response(content, media_type=media_type, headers=headers)
+
+
+@router.get("/{project_id}/facts", response_model=list[FactOut])
+def project_facts(
+    project_id: int,
+    dataset: str | None = None,
+    metric: str | None = None,
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    project = db.query(Project).filter(Project.id == project_id, Project.user_id == current_user.id).first()
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    return [
+        FactOut(
+            paper_id=fact.paper_id,
+            paper_title=title,
+            dataset=fact.dataset,
+            metric=fact.metric,
+            value=fact.value,
+            value_numeric=fact.value_numeric,
+            setting=fact.setting,
+        )
+        for fact, title in facts_for(db, project.id, dataset, metric)
+    ]
+
+
+@router.get("/{project_id}/compare", response_model=list[ComparisonRow])
+def project_compare(
+    project_id: int,
+    dataset: str | None = None,
+    metric: str | None = None,
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    project = db.query(Project).filter(Project.id == project_id, Project.user_id == current_user.id).first()
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    return compare(db, project.id, dataset, metric)
@@ -0,0 +1,18 @@
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+
+
+def schema_columns(schema: type[BaseModel], entity) -> list:
+    """The mapped columns of ``entity`` named like the fields of ``schema``."""
+    return [getattr(entity, name) for name in schema.__fields__]
+
+
+def rows_response(rows, schema: type[BaseModel]) -> ORJSONResponse:
+    """Serialize rows of ``schema_columns(schema, ...)`` without building a model per row.
+
+    Only for schemas whose fields are plain JSON values, datetimes or JSON
+    columns: no validators, aliases or nested models that would change the
+    output. The endpoint keeps ``response_model=schema`` for the OpenAPI docs.
+    """
+    keys = list(schema.__fields__)
+    return ORJSONResponse([dict(zip(keys, row)) for row in rows])
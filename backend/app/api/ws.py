@@ -1,16 +1,34 @@
 import asyncio
-import json
 
-import redis.asyncio as aioredis
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 
 from api.deps import get_current_user, oauth2_scheme
 from core.config import get_settings
+from infrastructure.fanout import Subscriber, event_hub, parse_event_id
 
 router = APIRouter(prefix="/ws", tags=["ws"])
 settings = get_settings()
 
 
+async def _forward_events(websocket: WebSocket, subscriber: Subscriber, replayed_up_to: str | None = None):
+    replayed_key = parse_event_id(replayed_up_to) if replayed_up_to else None
+    while True:
+        event = await subscriber.get()
+        if event is None:
+            return
+        # Live events that were already sent as part of the replay are skipped.
+        if replayed_key and event.id and parse_event_id(event.id) <= replayed_key:
+            continue
+        await websocket.send_text(event.data)
+
+
+async def _wait_disconnect(websocket: WebSocket):
+    while True:
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            return
+
+
 @router.websocket("/projects/{project_id}")
 async def project_ws(websocket: WebSocket, project_id: int):
     token = websocket.query_params.get("token")
@@ -24,29 +42,38 @@ async def project_ws(websocket: WebSocket, project_id: int):
         await websocket.close()
         return
 
+    last_event_id = websocket.query_params.get("last_event_id")
+    if last_event_id is not None:
+        try:
+            parse_event_id(last_event_id)
+        except ValueError:
+            await websocket.close()
+            return
+
     await websocket.accept()
-    if settings.redis_url.startswith("memory"):
+    if not event_hub.enabled:
         await websocket.send_json({"type": "info", "payload": "PubSub disabled in current config."})
         await websocket.close()
         return
 
-    redis_conn = aioredis.from_url(settings.redis_url)
-    pubsub = redis_conn.pubsub()
-    await pubsub.subscribe(f"ws:project:{project_id}")
+    # Subscribe before reading the log so nothing published in between is lost.
+    subscriber = await event_hub.subscribe(project_id)
     try:
-        while True:
-            message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
-            if message and message.get("data"):
-                payload = message["data"]
-                try:
-                    decoded = json.loads(payload)
-                except Exception:
-                    decoded = {"raw": str(payload)}
-                await websocket.send_json(decoded)
-            await asyncio.sleep(0.2)
+        replayed_up_to = last_event_id
+        if last_event_id is not None:
+            for event in await event_hub.history(project_id, last_event_id):
+                await websocket.send_text(event.data)
+                replayed_up_to = event.id
+        sender = asyncio.create_task(_forward_events(websocket, subscriber, replayed_up_to))
+        receiver = asyncio.create_task(_wait_disconnect(websocket))
+        done, pending = await asyncio.wait({sender, receiver}, return_when=asyncio.FIRST_COMPLETED)
+        for task in pending:
+            task.cancel()
+        for task in done:
+            task.result()
     except WebSocketDisconnect:
-        await pubsub.unsubscribe(f"ws:project:{project_id}")
-        await redis_conn.aclose()
+        pass
     except Exception:
         await websocket.close()
-        await redis_conn.aclose()
+    finally:
+        event_hub.unsubscribe(project_id, subscriber)
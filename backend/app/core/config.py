@@ -15,6 +15,7 @@ class Settings(BaseSettings):
     redis_url: str = Field("redis://redis:6379/0", env="REDIS_URL")
     chroma_dir: str = Field("/data/chroma", env="CHROMA_DIR")
     storage_root: str = Field("/data/storage", env="STORAGE_ROOT")
+    blob_compression_level: int = Field(3, env="BLOB_COMPRESSION_LEVEL")
 
     jwt_secret: str = Field("dev-secret", env="JWT_SECRET")
     jwt_algorithm: str = "HS256"
@@ -22,11 +23,61 @@ class Settings(BaseSettings):
 
     llm_provider: str = Field("mock", env="LLM_PROVIDER")
     embed_provider: str = Field("mock", env="EMBED_PROVIDER")
+    llm_model: str = Field("gpt-4o-mini", env="LLM_MODEL")
+    embed_model: str = Field("text-embedding-3-small", env="EMBED_MODEL")
+    provider_timeout: float = Field(60.0, env="PROVIDER_TIMEOUT")
+    provider_max_connections: int = Field(20, env="PROVIDER_MAX_CONNECTIONS")
+    # Shared across all workers; 0 disables the corresponding bucket.
+    llm_requests_per_minute: int = Field(0, env="LLM_REQUESTS_PER_MINUTE")
+    llm_tokens_per_minute: int = Field(0, env="LLM_TOKENS_PER_MINUTE")
+    llm_completion_tokens: int = Field(1024, env="LLM_COMPLETION_TOKENS")
+    embed_requests_per_minute: int = Field(0, env="EMBED_REQUESTS_PER_MINUTE")
+    embed_tokens_per_minute: int = Field(0, env="EMBED_TOKENS_PER_MINUTE")
+    rate_limit_max_wait_seconds: float = Field(300.0, env="RATE_LIMIT_MAX_WAIT_SECONDS")
     openai_base_url: str = Field("", env="OPENAI_COMPAT_BASE_URL")
     openai_api_key: str = Field("", env="OPENAI_COMPAT_API_KEY")
     coze_base_url: str = Field("", env="COZE_BASE_URL")
     coze_api_key: str = Field("", env="COZE_API_KEY")
     coze_model: str = Field("coze-default", env="COZE_MODEL")
+    coze_timeout: float = Field(30.0, env="COZE_TIMEOUT")
+    coze_http2: bool = Field(True, env="COZE_HTTP2")
+    coze_max_connections: int = Field(100, env="COZE_MAX_CONNECTIONS")
+    coze_max_keepalive_connections: int = Field(20, env="COZE_MAX_KEEPALIVE_CONNECTIONS")
+    coze_keepalive_expiry: float = Field(30.0, env="COZE_KEEPALIVE_EXPIRY")
+
+    chat_cache_enabled: bool = Field(False, env="CHAT_CACHE_ENABLED")
+    chat_cache_threshold: float = Field(0.95, env="CHAT_CACHE_THRESHOLD")
+    chat_cache_max_entries: int = Field(1024, env="CHAT_CACHE_MAX_ENTRIES")
+    chat_cache_ttl_seconds: int = Field(3600, env="CHAT_CACHE_TTL_SECONDS")
+    chat_cache_context_messages: int = Field(2, env="CHAT_CACHE_CONTEXT_MESSAGES")
+
+    # Responses smaller than this are sent uncompressed.
+    compression_minimum_size: int = Field(1024, env="COMPRESSION_MINIMUM_SIZE")
+    gzip_level: int = Field(6, env="GZIP_LEVEL")
+    brotli_quality: int = Field(4, env="BROTLI_QUALITY")
+
+    ws_client_queue_size: int = Field(100, env="WS_CLIENT_QUEUE_SIZE")
+    event_stream_maxlen: int = Field(1000, env="EVENT_STREAM_MAXLEN")
+    event_stream_ttl_seconds: int = Field(7 * 24 * 3600, env="EVENT_STREAM_TTL_SECONDS")
+    event_flush_interval_ms: int = Field(100, env="EVENT_FLUSH_INTERVAL_MS")
+    event_flush_max_batch: int = Field(100, env="EVENT_FLUSH_MAX_BATCH")
+    stage_commit_interval_seconds: float = Field(2.0, env="STAGE_COMMIT_INTERVAL_SECONDS")
+
+    pipeline_io_queue: str = Field("pipeline.io", env="PIPELINE_IO_QUEUE")
+    pipeline_cpu_queue: str = Field("pipeline.cpu", env="PIPELINE_CPU_QUEUE")
+    max_concurrent_runs_per_user: int = Field(2, env="MAX_CONCURRENT_RUNS_PER_USER")
+    max_batch_projects: int = Field(50, env="MAX_BATCH_PROJECTS")
+    interactive_max_papers: int = Field(20, env="INTERACTIVE_MAX_PAPERS")
+    worker_run_slots: int = Field(4, env="WORKER_RUN_SLOTS")
+    default_run_seconds: float = Field(60.0, env="DEFAULT_RUN_SECONDS")
+    celery_visibility_timeout: int = Field(6 * 3600, env="CELERY_VISIBILITY_TIMEOUT")
+    # How long a dispatched run may wait in the broker for a worker before its slot is reclaimed.
+    scheduled_run_timeout: int = Field(7 * 24 * 3600, env="SCHEDULED_RUN_TIMEOUT")
+    # Chunks per embedding request when a batch run embeds many papers at once.
+    embed_batch_size: int = Field(256, env="EMBED_BATCH_SIZE")
+    worker_metrics_port: int = Field(9100, env="WORKER_METRICS_PORT")
+    # Celery beat sweeps blobs no project references any more (replaced by re-runs and refreshes).
+    blob_gc_interval_seconds: int = Field(3600, env="BLOB_GC_INTERVAL_SECONDS")
 
     task_always_eager: bool = Field(False, env="CELERY_TASK_ALWAYS_EAGER")
 
@@ -1,23 +1,29 @@
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Optional
 
-from jose import JWTError, jwt
-from passlib.context import CryptContext
-
 from core.config import get_settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+@lru_cache()
+def _pwd_context():
+    # passlib/bcrypt are only needed to register and log in; keep them off the import path.
+    from passlib.context import CryptContext
+
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return _pwd_context().verify(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return _pwd_context().hash(password)
 
 
 def create_access_token(subject: str, expires_delta: Optional[timedelta] = None) -> str:
+    from jose import jwt
+
     settings = get_settings()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=settings.access_token_expire_minutes))
     to_encode = {"sub": subject, "exp": expire}
@@ -25,6 +31,8 @@ def create_access_token(subject: str, expires_delta: Optional[timedelta] = None)
 
 
 def decode_access_token(token: str) -> Optional[str]:
+    from jose import JWTError, jwt
+
     settings = get_settings()
     try:
         payload = jwt.decode(token, settings.jwt_secret, algorithms=[settings.jwt_algorithm])
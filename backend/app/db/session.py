@@ -1,10 +1,17 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker
 
 from core.config import get_settings
+from infrastructure.metrics import TimedQueuePool, instrument_pool
 
 settings = get_settings()
-engine = create_engine(settings.database_url, future=True)
+# Server databases get the checkout-timing pool; SQLite keeps its default pool.
+engine_options = {}
+if make_url(settings.database_url).get_backend_name() != "sqlite":
+    engine_options["poolclass"] = TimedQueuePool
+engine = create_engine(settings.database_url, future=True, **engine_options)
+instrument_pool(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, future=True)
 
 
@@ -14,20 +14,25 @@ class PaperMetadata:
     categories: list[str]
     published_at: datetime
     pdf_url: str
+    updated_at: datetime | None = None  # bumped by arXiv for every new version
 
 
 class ArxivAdapter:
-    def search(self, query: str, start: int, max_results: int) -> List[PaperMetadata]:
+    def search(
+        self, query: str, start: int, max_results: int, updated_since: datetime | None = None
+    ) -> List[PaperMetadata]:
+        """Papers matching ``query``; with ``updated_since``, only those submitted or revised after it."""
         # Mock implementation for MVP
-        return [
+        results = [
             PaperMetadata(
                 arxiv_id="1234.5678",
                 title="Mock Paper on {query}",
                 authors=["John Doe"],
                 abstract="This is a mock abstract about " + query,
                 categories=["cs.AI"],
-                published_at=datetime.utcnow(),
+                published_at=datetime(2024, 1, 15),
                 pdf_url="http://example.com/mock.pdf",
+                updated_at=datetime(2024, 1, 15),
             ),
             PaperMetadata(
                 arxiv_id="2345.6789",
@@ -35,10 +40,18 @@ class ArxivAdapter:
                 authors=["Jane Doe"],
                 abstract="Additional mock abstract about " + query,
                 categories=["cs.CL"],
-                published_at=datetime.utcnow(),
+                published_at=datetime(2024, 2, 1),
                 pdf_url="http://example.com/mock2.pdf",
+                updated_at=datetime(2024, 3, 1),
             ),
-        ][:max_results]
+        ]
+        if updated_since is not None:
+            results = [meta for meta in results if (meta.updated_at or meta.published_at) > updated_since]
+        return results[:max_results]
+
+    def fetch_pdf(self, paper: Paper) -> bytes | None:
+        """PDF bytes of ``paper``, or None when only metadata is available."""
+        return None
 
 
 class MockArxivAdapter(ArxivAdapter):
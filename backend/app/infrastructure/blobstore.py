@@ -0,0 +1,74 @@
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+
+try:
+    import zstandard
+except ImportError:  # optional: blobs are stored uncompressed without it
+    zstandard = None
+
+ZSTD = "zstd"
+
+
+class BlobStore:
+    """Content-addressed files under ``root``, sharded by the first hex digits of their sha256.
+
+    ``ab/cd/abcd...`` keeps every directory small no matter how many blobs
+    exist. Writes go to a temp file in the target directory and are renamed
+    into place, so a crash never leaves a truncated blob behind.
+    """
+
+    def __init__(self, root: str, compression_level: int = 3):
+        self.root = Path(root)
+        self.compression_level = compression_level
+
+    def path(self, digest: str, compression: str | None = None) -> Path:
+        suffix = ".zst" if compression == ZSTD else ""
+        return self.root / digest[:2] / digest[2:4] / f"{digest}{suffix}"
+
+    @staticmethod
+    def digest(data: bytes) -> str:
+        return hashlib.sha256(data).hexdigest()
+
+    @staticmethod
+    def compression_for(compress: bool) -> str | None:
+        return ZSTD if compress and zstandard is not None else None
+
+    def put(self, data: bytes, compress: bool = False) -> tuple[str, str | None]:
+        """Store ``data`` unless it is already present; returns (sha256 digest, compression)."""
+        digest = self.digest(data)
+        compression = self.compression_for(compress)
+        target = self.path(digest, compression)
+        if target.exists():
+            return digest, compression
+        if compression == ZSTD:
+            data = zstandard.ZstdCompressor(level=self.compression_level).compress(data)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=target.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, target)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        return digest, compression
+
+    def read(self, digest: str, compression: str | None = None) -> bytes:
+        data = self.path(digest, compression).read_bytes()
+        if compression == ZSTD:
+            if zstandard is None:
+                raise RuntimeError("zstandard is required to read compressed blobs")
+            data = zstandard.ZstdDecompressor().decompress(data)
+        return data
+
+    def delete(self, digest: str, compression: str | None = None):
+        try:
+            self.path(digest, compression).unlink()
+        except FileNotFoundError:
+            pass
@@ -1,12 +1,108 @@
-from typing import List
-import random
+from __future__ import annotations
 
+import hashlib
+from typing import TYPE_CHECKING, List
+
+from infrastructure.tokens import TokenUsage, estimate_tokens
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# numpy is imported on first use so the API process starts without it.
+
+
+def as_matrix(vectors, normalize: bool = False) -> np.ndarray:
+    """``vectors`` as a C-contiguous float32 (n, dim) array; no copy if it already is one.
+
+    ``normalize`` scales the rows in place.
+    """
+    import numpy as np
+
+    matrix = np.ascontiguousarray(vectors, dtype=np.float32)
+    if matrix.ndim == 1 and not matrix.size:
+        matrix = matrix.reshape(0, 0)
+    if normalize:
+        l2_normalize(matrix)
+    return matrix
+
+
+def l2_normalize(matrix: np.ndarray) -> np.ndarray:
+    """Scale the rows of ``matrix`` to unit length in place; all-zero rows are left as they are."""
+    import numpy as np
+
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    np.divide(matrix, norms, out=matrix, where=norms > 0)
+    return matrix
+
+
+class EmbeddingProvider(TokenUsage):
+    """Implement ``embed_array``; list-native providers may implement ``embed`` instead."""
+
+    def warm_up(self):
+        """Open connections / load models ahead of the first call."""
+
+    def embed_array(self, texts: List[str], normalize: bool = False) -> np.ndarray:
+        """One float32 (len(texts), dim) row per text, L2-normalized if ``normalize``."""
+        if type(self).embed is EmbeddingProvider.embed:
+            raise NotImplementedError
+        return as_matrix(self.embed(texts), normalize)
 
-class EmbeddingProvider:
     def embed(self, texts: List[str]) -> List[List[float]]:
-        raise NotImplementedError
+        """Compatibility shim: ``embed_array`` as nested lists."""
+        return self.embed_array(texts).tolist()
 
 
 class MockEmbeddingProvider(EmbeddingProvider):
-    def embed(self, texts: List[str]) -> List[List[float]]:
-        return [[random.random() for _ in range(4)] for _ in texts]
+    """Deterministic pseudo-random vectors seeded by a hash of each text."""
+
+    def __init__(self, dim: int = 4):
+        self.dim = dim
+
+    def embed_array(self, texts: List[str], normalize: bool = False) -> np.ndarray:
+        import numpy as np
+
+        self.record_usage(sum(map(estimate_tokens, texts)))
+        seeds = np.fromiter(
+            (int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), "little") for text in texts),
+            dtype=np.uint64,
+            count=len(texts),
+        )
+        # splitmix64 over (seed, column): one vectorized pass for the whole batch.
+        with np.errstate(over="ignore"):
+            x = seeds[:, None] + (np.arange(1, self.dim + 1, dtype=np.uint64) * np.uint64(0x9E3779B97F4A7C15))
+            x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+            x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+            x ^= x >> np.uint64(31)
+        matrix = ((x >> np.uint64(40)).astype(np.float32) * np.float32(2.0 ** -23)) - np.float32(1.0)
+        return l2_normalize(matrix) if normalize else matrix
+
+
+class OpenAICompatEmbeddingProvider(EmbeddingProvider):
+    """Embeddings from any OpenAI-compatible endpoint, over one pooled client."""
+
+    def __init__(self, base_url: str, api_key: str, model: str, timeout: float = 60.0, max_connections: int = 20):
+        import httpx
+
+        self.model = model
+        self.client = httpx.Client(
+            base_url=base_url.rstrip("/"),
+            headers={"Authorization": f"Bearer {api_key}"},
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+
+    def embed_array(self, texts: List[str], normalize: bool = False) -> np.ndarray:
+        import numpy as np
+
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        response = self.client.post("/v1/embeddings", json={"model": self.model, "input": texts})
+        response.raise_for_status()
+        body = response.json()
+        usage = body.get("usage") or {}
+        self.record_usage(usage.get("total_tokens") or sum(map(estimate_tokens, texts)))
+        data = sorted(body["data"], key=lambda item: item["index"])
+        return as_matrix([item["embedding"] for item in data], normalize)
+
+    def close(self):
+        self.client.close()
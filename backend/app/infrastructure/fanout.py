@@ -0,0 +1,205 @@
+import asyncio
+import json
+import logging
+from collections import deque
+from dataclasses import dataclass
+
+import redis.asyncio as aioredis
+
+from core.config import get_settings
+from infrastructure.pubsub import COALESCE_EVENT_TYPES, project_stream_key
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = "ws:project:"
+
+
+@dataclass
+class ProjectEvent:
+    type: str
+    data: str
+    id: str | None = None
+
+
+def parse_event_id(event_id: str) -> tuple[int, int]:
+    """Order key for a Redis stream id (``<ms>-<seq>``); raises ValueError if malformed."""
+    ms, _, seq = event_id.partition("-")
+    return int(ms), int(seq or 0)
+
+
+class Subscriber:
+    """Bounded per-client event queue.
+
+    Pending events of a coalescable type are replaced by newer ones; when the
+    queue is still full the oldest event is dropped so a slow consumer never
+    holds back the dispatcher.
+    """
+
+    def __init__(self, max_queue: int):
+        self._queue: deque[ProjectEvent] = deque()
+        self._max_queue = max(1, max_queue)
+        self._ready = asyncio.Event()
+        self._closed = False
+        self.dropped = 0
+
+    def push(self, event: ProjectEvent):
+        if self._closed:
+            return
+        if event.type in COALESCE_EVENT_TYPES:
+            for pending in self._queue:
+                if pending.type == event.type:
+                    self._queue.remove(pending)
+                    break
+        self._queue.append(event)
+        while len(self._queue) > self._max_queue:
+            self._queue.popleft()
+            self.dropped += 1
+        self._ready.set()
+
+    def close(self):
+        self._closed = True
+        self._ready.set()
+
+    async def get(self) -> ProjectEvent | None:
+        while not self._queue:
+            if self._closed:
+                return None
+            self._ready.clear()
+            await self._ready.wait()
+        return self._queue.popleft()
+
+
+class ProjectEventHub:
+    """One Redis pattern subscription per process, fanned out to in-memory subscribers."""
+
+    def __init__(self, redis_url: str, max_queue: int = 100):
+        self.redis_url = redis_url
+        self.max_queue = max_queue
+        self._subscribers: dict[int, set[Subscriber]] = {}
+        self._task: asyncio.Task | None = None
+        self._lock = asyncio.Lock()
+        self._redis: aioredis.Redis | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.redis_url) and not self.redis_url.startswith("memory")
+
+    async def subscribe(self, project_id: int) -> Subscriber:
+        await self._ensure_started()
+        subscriber = Subscriber(self.max_queue)
+        self._subscribers.setdefault(project_id, set()).add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, project_id: int, subscriber: Subscriber):
+        subscriber.close()
+        subscribers = self._subscribers.get(project_id)
+        if subscribers is None:
+            return
+        subscribers.discard(subscriber)
+        if not subscribers:
+            self._subscribers.pop(project_id, None)
+
+    def subscriber_count(self, project_id: int | None = None) -> int:
+        if project_id is not None:
+            return len(self._subscribers.get(project_id, ()))
+        return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    def dispatch(self, channel: str, data):
+        if isinstance(data, bytes):
+            data = data.decode("utf-8", errors="replace")
+        if isinstance(channel, bytes):
+            channel = channel.decode()
+        try:
+            project_id = int(channel[len(CHANNEL_PREFIX):])
+        except ValueError:
+            return
+        subscribers = self._subscribers.get(project_id)
+        if not subscribers:
+            return
+        # Decode once per message rather than once per client.
+        try:
+            decoded = json.loads(data)
+        except Exception:
+            decoded = None
+        if isinstance(decoded, dict):
+            event = ProjectEvent(type=str(decoded.get("type", "")), data=data, id=decoded.get("id"))
+        else:
+            event = ProjectEvent(type="", data=json.dumps({"raw": str(data)}))
+        for subscriber in subscribers:
+            subscriber.push(event)
+
+    async def history(self, project_id: int, after_id: str, batch_size: int = 500) -> list[ProjectEvent]:
+        """Read logged events newer than ``after_id`` ("0" for the whole log) in stream order."""
+        if not self.enabled:
+            return []
+        if self._redis is None:
+            self._redis = aioredis.from_url(self.redis_url)
+        key = project_stream_key(project_id)
+        events: list[ProjectEvent] = []
+        cursor = after_id
+        while True:
+            # XREAD is exclusive of the cursor id, so each page resumes right after the last entry.
+            response = await self._redis.xread({key: cursor}, count=batch_size)
+            entries = response[0][1] if response else []
+            for entry_id, fields in entries:
+                entry_id = entry_id.decode() if isinstance(entry_id, bytes) else entry_id
+                raw = fields.get(b"event") or fields.get("event") or b"{}"
+                message = json.loads(raw)
+                message = {"id": entry_id, **message}
+                events.append(ProjectEvent(type=str(message.get("type", "")), data=json.dumps(message), id=entry_id))
+                cursor = entry_id
+            if len(entries) < batch_size:
+                return events
+
+    async def _ensure_started(self):
+        if not self.enabled or (self._task and not self._task.done()):
+            return
+        async with self._lock:
+            if self._task and not self._task.done():
+                return
+            self._task = asyncio.create_task(self._listen())
+
+    async def _listen(self):
+        backoff = 0.5
+        while True:
+            redis_conn = aioredis.from_url(self.redis_url)
+            pubsub = redis_conn.pubsub()
+            try:
+                await pubsub.psubscribe(f"{CHANNEL_PREFIX}*")
+                backoff = 0.5
+                async for message in pubsub.listen():
+                    if message.get("type") != "pmessage" or not message.get("data"):
+                        continue
+                    self.dispatch(message["channel"], message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning("project event listener disconnected, retrying in %.1fs", backoff)
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 10.0)
+            finally:
+                try:
+                    await pubsub.aclose()
+                    await redis_conn.aclose()
+                except Exception:
+                    pass
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._task = None
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+        for subscribers in self._subscribers.values():
+            for subscriber in subscribers:
+                subscriber.close()
+        self._subscribers.clear()
+
+
+_settings = get_settings()
+event_hub = ProjectEventHub(_settings.redis_url, max_queue=_settings.ws_client_queue_size)
@@ -0,0 +1,65 @@
+from typing import List
+
+from infrastructure.embedding import EmbeddingProvider
+from infrastructure.llm import LLMProvider
+from infrastructure.metrics import observe_call
+
+
+class InstrumentedLLMProvider(LLMProvider):
+    """Records latency and errors of every call under the ``provider`` label."""
+
+    def __init__(self, inner: LLMProvider, name: str):
+        self.inner = inner
+        self.name = name
+
+    @property
+    def total_tokens(self) -> int:
+        return self.inner.total_tokens
+
+    def thread_tokens(self) -> int:
+        return self.inner.thread_tokens()
+
+    @property
+    def batch_concurrency(self) -> int:
+        return self.inner.batch_concurrency
+
+    def warm_up(self):
+        self.inner.warm_up()
+
+    def generate_structured(self, prompt: str, schema: dict) -> dict:
+        with observe_call(self.name, "generate_structured"):
+            return self.inner.generate_structured(prompt, schema)
+
+    def write_markdown(self, outline: str, evidence: List[str]) -> str:
+        with observe_call(self.name, "write_markdown"):
+            return self.inner.write_markdown(outline, evidence)
+
+    def close(self):
+        close = getattr(self.inner, "close", None)
+        if close is not None:
+            close()
+
+
+class InstrumentedEmbeddingProvider(EmbeddingProvider):
+    def __init__(self, inner: EmbeddingProvider, name: str):
+        self.inner = inner
+        self.name = name
+
+    @property
+    def total_tokens(self) -> int:
+        return self.inner.total_tokens
+
+    def thread_tokens(self) -> int:
+        return self.inner.thread_tokens()
+
+    def warm_up(self):
+        self.inner.warm_up()
+
+    def embed_array(self, texts: List[str], normalize: bool = False):
+        with observe_call(self.name, "embed"):
+            return self.inner.embed_array(texts, normalize)
+
+    def close(self):
+        close = getattr(self.inner, "close", None)
+        if close is not None:
+            close()
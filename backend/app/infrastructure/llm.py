@@ -1,22 +1,105 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
 from typing import List
 
+from infrastructure.tokens import TokenUsage, estimate_tokens
+
+
+class LLMProvider(TokenUsage):
+    # Requests ``generate_structured_batch`` keeps in flight at once.
+    batch_concurrency: int = 1
+
+    def warm_up(self):
+        """Open connections / load models ahead of the first call."""
 
-class LLMProvider:
     def generate_structured(self, prompt: str, schema: dict) -> dict:
         raise NotImplementedError
 
+    def generate_structured_batch(self, prompts: List[str], schema: dict, return_exceptions: bool = False) -> list:
+        """``(result, tokens)`` of ``generate_structured`` for every prompt, in order.
+
+        ``tokens`` is that call's own usage, even with calls running concurrently.
+        With ``return_exceptions`` a failed prompt yields its exception instead
+        of aborting the batch.
+        """
+
+        def call(prompt: str):
+            before = self.thread_tokens()
+            try:
+                result = self.generate_structured(prompt, schema)
+            except Exception as exc:  # noqa: BLE001
+                if not return_exceptions:
+                    raise
+                result = exc
+            return result, self.thread_tokens() - before
+
+        workers = min(self.batch_concurrency, len(prompts))
+        if workers <= 1:
+            return [call(prompt) for prompt in prompts]
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(call, prompts))
+
     def write_markdown(self, outline: str, evidence: List[str]) -> str:
         raise NotImplementedError
 
 
 class MockLLMProvider(LLMProvider):
     def generate_structured(self, prompt: str, schema: dict) -> dict:
-        return {
+        result = {
             "methodology": {"name": "mock", "steps": ["step1", "step2"]},
             "datasets": [{"name": "mock-dataset", "desc": "synthetic"}],
             "metrics": [{"name": "acc", "value": "0.9", "setting": "mock"}],
             "limitations": "mock limitations",
         }
+        self.record_usage(estimate_tokens(prompt) + estimate_tokens(json.dumps(result)))
+        return result
 
     def write_markdown(self, outline: str, evidence: List[str]) -> str:
-        return f"# Summary\n\n{outline}\n\n" + "\n".join(evidence)
+        markdown = f"# Summary\n\n{outline}\n\n" + "\n".join(evidence)
+        self.record_usage(estimate_tokens(outline) + sum(map(estimate_tokens, evidence)) + estimate_tokens(markdown))
+        return markdown
+
+
+class OpenAICompatLLMProvider(LLMProvider):
+    """Chat-completions provider for any OpenAI-compatible endpoint, over one pooled client."""
+
+    def __init__(self, base_url: str, api_key: str, model: str, timeout: float = 60.0, max_connections: int = 20):
+        import httpx
+
+        self.model = model
+        self.batch_concurrency = max_connections
+        self.client = httpx.Client(
+            base_url=base_url.rstrip("/"),
+            headers={"Authorization": f"Bearer {api_key}"},
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+
+    def _chat(self, messages: list[dict], **extra) -> str:
+        response = self.client.post("/v1/chat/completions", json={"model": self.model, "messages": messages, **extra})
+        response.raise_for_status()
+        data = response.json()
+        usage = data.get("usage") or {}
+        self.record_usage(usage.get("total_tokens") or sum(estimate_tokens(m["content"]) for m in messages))
+        return data["choices"][0]["message"]["content"] or ""
+
+    def generate_structured(self, prompt: str, schema: dict) -> dict:
+        instruction = "Extract methodology, datasets, metrics and limitations as a JSON object."
+        if schema:
+            instruction += " Follow this JSON schema: " + json.dumps(schema)
+        content = self._chat(
+            [{"role": "system", "content": instruction}, {"role": "user", "content": prompt}],
+            response_format={"type": "json_object"},
+        )
+        return json.loads(content or "{}")
+
+    def write_markdown(self, outline: str, evidence: List[str]) -> str:
+        return self._chat(
+            [
+                {"role": "system", "content": "Write a literature review in Markdown from the outline and evidence."},
+                {"role": "user", "content": outline + "\n\n" + "\n".join(evidence)},
+            ]
+        )
+
+    def close(self):
+        self.client.close()
@@ -0,0 +1,134 @@
+import os
+import time
+from contextlib import contextmanager
+
+from prometheus_client import REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, multiprocess
+from prometheus_client.core import GaugeMetricFamily
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool
+
+# With PROMETHEUS_MULTIPROC_DIR set (required for prefork Celery workers and
+# multi-process uvicorn) every process writes its samples there and the
+# exporter aggregates them; otherwise the default in-process registry is used.
+MULTIPROCESS = bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+STAGE_SECONDS = Histogram(
+    "pipeline_stage_duration_seconds",
+    "Time spent in a pipeline stage (per paper for per-paper stages)",
+    ["stage"],
+    buckets=_LATENCY_BUCKETS,
+)
+PAPERS = Counter("pipeline_papers_total", "Papers that completed a per-paper stage", ["stage"])
+CHUNKS = Counter("pipeline_chunks_total", "Text chunks embedded")
+PROVIDER_SECONDS = Histogram(
+    "provider_request_duration_seconds",
+    "Latency of calls to external providers",
+    ["provider", "operation"],
+    buckets=_LATENCY_BUCKETS,
+)
+PROVIDER_ERRORS = Counter("provider_errors_total", "Failed calls to external providers", ["provider", "operation"])
+PROVIDER_RETRIES = Counter("provider_retries_total", "Provider calls that had to wait and retry", ["provider", "reason"])
+CACHE_REQUESTS = Counter("cache_requests_total", "Cache lookups by outcome", ["cache", "result"])
+DB_POOL_CHECKOUT_SECONDS = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled database connection",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30),
+)
+DB_POOL_SIZE = Gauge("db_pool_size", "Configured database pool size", multiprocess_mode="livesum")
+DB_POOL_CHECKED_OUT = Gauge("db_pool_checked_out", "Database connections in use", multiprocess_mode="livesum")
+DB_POOL_OVERFLOW = Gauge("db_pool_overflow", "Connections opened beyond the pool size", multiprocess_mode="livesum")
+
+
+@contextmanager
+def observe_stage(stage: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.labels(stage).observe(time.perf_counter() - started)
+
+
+@contextmanager
+def observe_call(provider: str, operation: str):
+    """Time one provider call and count it as an error if it raises."""
+    started = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        PROVIDER_ERRORS.labels(provider, operation).inc()
+        raise
+    finally:
+        PROVIDER_SECONDS.labels(provider, operation).observe(time.perf_counter() - started)
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_CHECKOUT_SECONDS.observe(time.perf_counter() - started)
+
+
+def instrument_pool(engine):
+    """Keep the pool gauges current on every checkout and checkin."""
+    pool = engine.pool
+    if not isinstance(pool, QueuePool):
+        return
+    DB_POOL_SIZE.set(pool.size())
+
+    def _update(*_args):
+        DB_POOL_CHECKED_OUT.set(pool.checkedout())
+        DB_POOL_OVERFLOW.set(max(0, pool.overflow()))
+
+    event.listen(engine, "checkout", _update)
+    event.listen(engine, "checkin", _update)
+
+
+class CeleryQueueCollector:
+    """Messages waiting in each Redis-backed Celery queue, read at scrape time."""
+
+    def __init__(self, client, queues: list[str], priority_steps: list[int], sep: str = ":"):
+        self.client = client
+        self.queues = queues
+        self.priority_steps = priority_steps
+        self.sep = sep
+
+    def _keys(self, queue: str) -> list[str]:
+        # Kombu keeps priority 0 in the plain queue and the others in ``queue<sep>N``.
+        return [queue] + [f"{queue}{self.sep}{step}" for step in self.priority_steps if step]
+
+    def collect(self):
+        family = GaugeMetricFamily("celery_queue_depth", "Messages waiting per Celery queue", labels=["queue"])
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for queue in self.queues:
+                for key in self._keys(queue):
+                    pipe.llen(key)
+            lengths = iter(pipe.execute())
+        except Exception:  # noqa: BLE001 - a scrape must not fail because Redis is down
+            yield family
+            return
+        for queue in self.queues:
+            family.add_metric([queue], sum(next(lengths) for _ in self._keys(queue)))
+        yield family
+
+
+def build_registry(*collectors) -> CollectorRegistry:
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    for collector in collectors:
+        registry.register(collector)
+    return registry
+
+
+def mark_process_dead(pid: int):
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(pid)
@@ -1,10 +1,19 @@
 import json
+import logging
+import os
+import threading
+
 import redis
 
 from core.config import get_settings
 
+logger = logging.getLogger(__name__)
+
 _settings = get_settings()
 
+# A pending event of these types is superseded by a newer one for the same project.
+COALESCE_EVENT_TYPES = {"stage"}
+
 redis_client = None
 if _settings.redis_url and not _settings.redis_url.startswith("memory"):
     try:
@@ -12,16 +21,120 @@ if _settings.redis_url and not _settings.redis_url.startswith("memory"):
     except Exception:
         redis_client = None
 
+# Append to the capped per-project stream and publish the same event, tagged
+# with its stream id, in a single round trip.
+_APPEND_AND_PUBLISH = """
+local id = redis.call('XADD', KEYS[1], 'MAXLEN', '~', ARGV[1], '*', 'event', ARGV[2])
+if tonumber(ARGV[3]) > 0 then
+    redis.call('EXPIRE', KEYS[1], ARGV[3])
+end
+redis.call('PUBLISH', KEYS[2], '{"id": "' .. id .. '", ' .. string.sub(ARGV[2], 2))
+return id
+"""
+_append_and_publish = redis_client.register_script(_APPEND_AND_PUBLISH) if redis_client else None
 
-def publish_project_event(project_id: int, event_type: str, payload: dict):
-    if not redis_client:
-        return
+
+def project_channel(project_id: int) -> str:
+    return f"ws:project:{project_id}"
+
+
+def project_stream_key(project_id: int) -> str:
+    return f"project:{project_id}:events"
+
+
+def _append_event(script, project_id: int, event_type: str, payload: dict, client=None):
     message = {
         "type": event_type,
         "project_id": project_id,
         "payload": payload,
     }
+    return script(
+        keys=[project_stream_key(project_id), project_channel(project_id)],
+        args=[_settings.event_stream_maxlen, json.dumps(message), _settings.event_stream_ttl_seconds],
+        client=client,
+    )
+
+
+def publish_project_event(project_id: int, event_type: str, payload: dict) -> str | None:
+    if not redis_client:
+        return None
     try:
-        redis_client.publish(f"ws:project:{project_id}", json.dumps(message))
+        event_id = _append_event(_append_and_publish, project_id, event_type, payload)
     except Exception:
-        return
+        return None
+    return event_id.decode() if isinstance(event_id, bytes) else event_id
+
+
+class BufferedEventPublisher:
+    """Buffers project events and flushes them to Redis in pipelines.
+
+    ``publish`` only appends to an in-memory buffer. A background thread flushes
+    it every ``flush_interval`` seconds, or as soon as ``max_batch`` events are
+    pending; ``flush`` sends everything synchronously.
+    """
+
+    def __init__(self, client, flush_interval: float = 0.1, max_batch: int = 100):
+        self.client = client
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self._script = client.register_script(_APPEND_AND_PUBLISH) if client is not None else None
+        self._pending: list[tuple[int, str, dict]] = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._pid: int | None = None
+
+    def publish(self, project_id: int, event_type: str, payload: dict):
+        if self.client is None:
+            return
+        self._ensure_thread()
+        with self._lock:
+            if event_type in COALESCE_EVENT_TYPES:
+                self._pending = [
+                    event for event in self._pending if event[0] != project_id or event[1] != event_type
+                ]
+            self._pending.append((project_id, event_type, payload))
+            if len(self._pending) >= self.max_batch:
+                self._wakeup.set()
+
+    def flush(self):
+        if self.client is None:
+            return
+        # Serialize flushes so batches reach Redis in the order they were taken.
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+            if not batch:
+                return
+            pipe = self.client.pipeline(transaction=False)
+            for project_id, event_type, payload in batch:
+                _append_event(self._script, project_id, event_type, payload, client=pipe)
+            try:
+                pipe.execute()
+            except Exception:
+                logger.warning("failed to flush %d project events", len(batch))
+
+    def _ensure_thread(self):
+        # Worker processes are forked after import, so the flusher is started per process.
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="event-publisher", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+
+event_publisher = BufferedEventPublisher(
+    redis_client,
+    flush_interval=_settings.event_flush_interval_ms / 1000,
+    max_batch=_settings.event_flush_max_batch,
+)
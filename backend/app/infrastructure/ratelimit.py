@@ -0,0 +1,170 @@
+import time
+from typing import List
+
+from infrastructure.embedding import EmbeddingProvider
+from infrastructure.llm import LLMProvider
+from infrastructure.metrics import PROVIDER_RETRIES
+from infrastructure.tokens import estimate_tokens
+
+# Refills the request and token buckets of one provider from the Redis clock and
+# either takes the requested amounts (returns 0) or returns the milliseconds to
+# wait until both buckets can cover them. A limit of 0 disables that bucket.
+_ACQUIRE = """
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) * 1000 + math.floor(tonumber(clock[2]) / 1000)
+local rpm = tonumber(ARGV[1])
+local tpm = tonumber(ARGV[2])
+local cost = math.min(tonumber(ARGV[3]), tpm)
+local state = redis.call('HMGET', KEYS[1], 'requests', 'tokens', 'ts')
+local requests = tonumber(state[1]) or rpm
+local tokens = tonumber(state[2]) or tpm
+local elapsed = math.max(0, now - (tonumber(state[3]) or now))
+requests = math.min(rpm, requests + elapsed * rpm / 60000)
+tokens = math.min(tpm, tokens + elapsed * tpm / 60000)
+local wait = 0
+if rpm > 0 and requests < 1 then
+    wait = math.max(wait, (1 - requests) * 60000 / rpm)
+end
+if tpm > 0 and tokens < cost then
+    wait = math.max(wait, (cost - tokens) * 60000 / tpm)
+end
+if wait == 0 then
+    if rpm > 0 then
+        requests = requests - 1
+    end
+    tokens = tokens - cost
+end
+redis.call('HSET', KEYS[1], 'requests', requests, 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], 120000)
+return math.ceil(wait)
+"""
+
+# Corrects the token bucket once the real usage of an admitted call is known.
+_SETTLE = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    redis.call('HINCRBYFLOAT', KEYS[1], 'tokens', ARGV[1])
+end
+return 0
+"""
+
+
+class RateLimitTimeout(RuntimeError):
+    pass
+
+
+class TokenBucketLimiter:
+    """Requests/min and tokens/min buckets shared by every worker through Redis."""
+
+    def __init__(self, client, max_wait: float = 300.0):
+        self.client = client
+        self.max_wait = max_wait
+        self._acquire = client.register_script(_ACQUIRE)
+        self._settle = client.register_script(_SETTLE)
+
+    @staticmethod
+    def _key(name: str) -> str:
+        return f"ratelimit:{name}"
+
+    def acquire(self, name: str, requests_per_minute: int, tokens_per_minute: int, tokens: int):
+        """Block until one request of ``tokens`` estimated tokens is admitted."""
+        deadline = time.monotonic() + self.max_wait
+        while True:
+            wait_ms = int(
+                self._acquire(keys=[self._key(name)], args=[requests_per_minute, tokens_per_minute, tokens])
+            )
+            if wait_ms <= 0:
+                return
+            if time.monotonic() + wait_ms / 1000 > deadline:
+                raise RateLimitTimeout(f"rate limit for {name} not admitted within {self.max_wait:.0f}s")
+            PROVIDER_RETRIES.labels(name, "rate_limit").inc()
+            time.sleep(wait_ms / 1000)
+
+    def settle(self, name: str, estimated: int, actual: int):
+        if actual != estimated:
+            self._settle(keys=[self._key(name)], args=[estimated - actual])
+
+
+class RateLimitedLLMProvider(LLMProvider):
+    """Admits each call through the shared limiter using the estimated prompt size."""
+
+    def __init__(
+        self,
+        inner: LLMProvider,
+        limiter: TokenBucketLimiter,
+        name: str,
+        rpm: int,
+        tpm: int,
+        completion_tokens: int,
+    ):
+        self.inner = inner
+        self.limiter = limiter
+        self.name = name
+        self.rpm = rpm
+        self.tpm = tpm
+        self.completion_tokens = completion_tokens
+
+    @property
+    def total_tokens(self) -> int:
+        return self.inner.total_tokens
+
+    def thread_tokens(self) -> int:
+        return self.inner.thread_tokens()
+
+    @property
+    def batch_concurrency(self) -> int:
+        return self.inner.batch_concurrency
+
+    def warm_up(self):
+        self.inner.warm_up()
+
+    def _call(self, prompt_tokens: int, method, *args):
+        estimated = prompt_tokens + self.completion_tokens
+        self.limiter.acquire(self.name, self.rpm, self.tpm, estimated)
+        before = self.inner.thread_tokens()
+        result = method(*args)
+        self.limiter.settle(self.name, estimated, self.inner.thread_tokens() - before)
+        return result
+
+    def generate_structured(self, prompt: str, schema: dict) -> dict:
+        return self._call(estimate_tokens(prompt), self.inner.generate_structured, prompt, schema)
+
+    def write_markdown(self, outline: str, evidence: List[str]) -> str:
+        prompt_tokens = estimate_tokens(outline) + sum(map(estimate_tokens, evidence))
+        return self._call(prompt_tokens, self.inner.write_markdown, outline, evidence)
+
+    def close(self):
+        close = getattr(self.inner, "close", None)
+        if close is not None:
+            close()
+
+
+class RateLimitedEmbeddingProvider(EmbeddingProvider):
+    def __init__(self, inner: EmbeddingProvider, limiter: TokenBucketLimiter, name: str, rpm: int, tpm: int):
+        self.inner = inner
+        self.limiter = limiter
+        self.name = name
+        self.rpm = rpm
+        self.tpm = tpm
+
+    @property
+    def total_tokens(self) -> int:
+        return self.inner.total_tokens
+
+    def thread_tokens(self) -> int:
+        return self.inner.thread_tokens()
+
+    def warm_up(self):
+        self.inner.warm_up()
+
+    def embed_array(self, texts: List[str], normalize: bool = False):
+        estimated = sum(map(estimate_tokens, texts))
+        self.limiter.acquire(self.name, self.rpm, self.tpm, estimated)
+        before = self.inner.thread_tokens()
+        vectors = self.inner.embed_array(texts, normalize)
+        self.limiter.settle(self.name, estimated, self.inner.thread_tokens() - before)
+        return vectors
+
+    def close(self):
+        close = getattr(self.inner, "close", None)
+        if close is not None:
+            close()
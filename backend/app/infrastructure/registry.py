@@ -0,0 +1,138 @@
+import threading
+
+from core.config import Settings, get_settings
+from infrastructure.arxiv import ArxivAdapter, MockArxivAdapter
+from infrastructure.embedding import EmbeddingProvider, MockEmbeddingProvider, OpenAICompatEmbeddingProvider
+from infrastructure.instrumented import InstrumentedEmbeddingProvider, InstrumentedLLMProvider
+from infrastructure.llm import LLMProvider, MockLLMProvider, OpenAICompatLLMProvider
+from infrastructure.pubsub import redis_client
+from infrastructure.ratelimit import RateLimitedEmbeddingProvider, RateLimitedLLMProvider, TokenBucketLimiter
+
+
+def _build_llm(settings: Settings, options: dict) -> LLMProvider:
+    name = options.get("name") or settings.llm_provider
+    if name == "mock":
+        return MockLLMProvider()
+    if name in ("openai", "openai_compat"):
+        return OpenAICompatLLMProvider(
+            base_url=settings.openai_base_url,
+            api_key=settings.openai_api_key,
+            model=options.get("model") or settings.llm_model,
+            timeout=settings.provider_timeout,
+            max_connections=settings.provider_max_connections,
+        )
+    raise ValueError(f"Unknown LLM provider: {name}")
+
+
+def _build_embedding(settings: Settings, options: dict) -> EmbeddingProvider:
+    name = options.get("name") or settings.embed_provider
+    if name == "mock":
+        return MockEmbeddingProvider()
+    if name in ("openai", "openai_compat"):
+        return OpenAICompatEmbeddingProvider(
+            base_url=settings.openai_base_url,
+            api_key=settings.openai_api_key,
+            model=options.get("model") or settings.embed_model,
+            timeout=settings.provider_timeout,
+            max_connections=settings.provider_max_connections,
+        )
+    raise ValueError(f"Unknown embedding provider: {name}")
+
+
+def _overrides(options: dict | None) -> dict:
+    return {key: value for key, value in (options or {}).items() if value is not None}
+
+
+class ProviderRegistry:
+    """Process-wide cache of provider instances.
+
+    Providers hold HTTP pools (and, for local backends, loaded models), so one
+    instance per distinct configuration is built and shared by every task the
+    process runs. Per-project ``ProviderConfig`` entries select among them.
+    """
+
+    def __init__(self, settings: Settings | None = None, limiter: TokenBucketLimiter | None = None):
+        self.settings = settings or get_settings()
+        self.limiter = limiter
+        self._instances: dict[tuple, object] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _provider_name(kind: str, options: dict) -> str:
+        return ":".join(str(part) for part in (kind, options["name"], options.get("model", "")) if part != "")
+
+    def _build_limited_llm(self, settings: Settings, options: dict) -> LLMProvider:
+        name = self._provider_name("llm", options)
+        provider = InstrumentedLLMProvider(_build_llm(settings, options), name)
+        rpm, tpm = settings.llm_requests_per_minute, settings.llm_tokens_per_minute
+        if self.limiter is None or not (rpm or tpm):
+            return provider
+        return RateLimitedLLMProvider(provider, self.limiter, name, rpm, tpm, settings.llm_completion_tokens)
+
+    def _build_limited_embedding(self, settings: Settings, options: dict) -> EmbeddingProvider:
+        name = self._provider_name("embedding", options)
+        provider = InstrumentedEmbeddingProvider(_build_embedding(settings, options), name)
+        rpm, tpm = settings.embed_requests_per_minute, settings.embed_tokens_per_minute
+        if self.limiter is None or not (rpm or tpm):
+            return provider
+        return RateLimitedEmbeddingProvider(provider, self.limiter, name, rpm, tpm)
+
+    def _get(self, kind: str, options: dict | None, build):
+        options = dict(options or {})
+        key = (kind, tuple(sorted((k, str(v)) for k, v in options.items())))
+        instance = self._instances.get(key)
+        if instance is None:
+            with self._lock:
+                instance = self._instances.get(key)
+                if instance is None:
+                    instance = build(self.settings, options)
+                    warm_up = getattr(instance, "warm_up", None)
+                    if warm_up is not None:
+                        warm_up()
+                    self._instances[key] = instance
+        return instance
+
+    def llm(self, options: dict | None = None) -> LLMProvider:
+        options = {"name": self.settings.llm_provider, **_overrides(options)}
+        return self._get("llm", options, self._build_limited_llm)
+
+    def embedding(self, options: dict | None = None) -> EmbeddingProvider:
+        options = {"name": self.settings.embed_provider, **_overrides(options)}
+        return self._get("embedding", options, self._build_limited_embedding)
+
+    def arxiv(self) -> ArxivAdapter:
+        return self._get("arxiv", None, lambda settings, options: MockArxivAdapter())
+
+    def for_project(self, config: dict | None) -> dict:
+        """Keyword arguments for ``PipelineService`` built from a project's provider config."""
+        providers = (config or {}).get("providers", {})
+        return {
+            "arxiv_adapter": self.arxiv(),
+            "llm_provider": self.llm(providers.get("llm")),
+            "embed_provider": self.embedding(providers.get("embedding")),
+        }
+
+    def warm_up(self):
+        """Build the default providers so the first task does not pay for them."""
+        self.arxiv()
+        self.llm()
+        self.embedding()
+
+    def reset(self):
+        """Forget instances inherited from a parent process without closing their pools."""
+        with self._lock:
+            self._instances.clear()
+
+    def close(self):
+        with self._lock:
+            for instance in self._instances.values():
+                close = getattr(instance, "close", None)
+                if close is not None:
+                    close()
+            self._instances.clear()
+
+
+_settings = get_settings()
+provider_registry = ProviderRegistry(
+    limiter=TokenBucketLimiter(redis_client, max_wait=_settings.rate_limit_max_wait_seconds) if redis_client else None
+)
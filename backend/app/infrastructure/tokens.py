@@ -0,0 +1,30 @@
+import threading
+
+_usage_lock = threading.Lock()
+_usage_local = threading.local()
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token) used when no tokenizer is available."""
+    return len(text) // 4 + 1
+
+
+class TokenUsage:
+    """Token accounting for providers that may be called from several threads at once.
+
+    ``total_tokens`` counts every call. ``thread_tokens()`` counts only the
+    calls made on the current thread, so its change around a call is that
+    call's own usage even while other threads use the same provider.
+    """
+
+    # Tokens consumed by this instance so far.
+    total_tokens: int = 0
+
+    def record_usage(self, tokens: int):
+        with _usage_lock:
+            self.total_tokens += tokens
+        per_thread = _usage_local.__dict__.setdefault("tokens", {})
+        per_thread[id(self)] = per_thread.get(id(self), 0) + tokens
+
+    def thread_tokens(self) -> int:
+        return getattr(_usage_local, "tokens", {}).get(id(self), 0)
@@ -3,9 +3,14 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 
-from api import auth, chat, projects, ws
+from api import auth, chat, metrics, papers, projects, ws
+from api.compression import CompressionMiddleware
+from core.config import get_settings
+from infrastructure.fanout import event_hub
+from services.coze import close_coze_client, start_coze_client
 from utils.files import ensure_storage_dirs
 
+settings = get_settings()
 app = FastAPI(title="Arxiv Review System", openapi_url="/api/v1/openapi.json")
 
 origins = ["*"]
@@ -16,11 +21,19 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.compression_minimum_size,
+    gzip_level=settings.gzip_level,
+    brotli_quality=settings.brotli_quality,
+)
 
 app.include_router(auth.router, prefix="/api/v1")
 app.include_router(chat.router, prefix="/api/v1")
+app.include_router(papers.router, prefix="/api/v1")
 app.include_router(projects.router, prefix="/api/v1")
 app.include_router(ws.router, prefix="/api/v1")
+app.include_router(metrics.router)
 
 frontend_dir = Path(__file__).resolve().parent.parent / "frontend"
 if frontend_dir.exists():
@@ -30,3 +43,10 @@ if frontend_dir.exists():
 @app.on_event("startup")
 async def startup_event():
     ensure_storage_dirs()
+    await start_coze_client()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await event_hub.stop()
+    await close_coze_client()
@@ -2,6 +2,8 @@ from models.user import User
 from models.project import Project
 from models.paper import Paper
 from models.analysis import Analysis
+from models.fact import Fact
 from models.export import Export
+from models.blob import Blob
 
-__all__ = ["User", "Project", "Paper", "Analysis", "Export"]
+__all__ = ["User", "Project", "Paper", "Analysis", "Fact", "Export", "Blob"]
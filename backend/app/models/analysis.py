@@ -19,3 +19,4 @@ class Analysis(Base):
 
     project = relationship("Project", back_populates="analyses")
     paper = relationship("Paper", back_populates="analyses")
+    facts = relationship("Fact", back_populates="analysis", cascade="all, delete-orphan")
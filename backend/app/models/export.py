@@ -12,6 +12,7 @@ class Export(Base):
     project_id = Column(Integer, ForeignKey("projects.id"), index=True, nullable=False)
     format = Column(String)
     local_path = Column(String)
+    blob_digest = Column(String(64), nullable=True)
     status = Column(String, default="pending")
     created_at = Column(DateTime, default=datetime.utcnow)
 
@@ -0,0 +1,28 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey, Index
+from sqlalchemy.orm import relationship
+
+from db.base import Base
+
+
+class Fact(Base):
+    """One (dataset, metric, value, setting) row flattened out of ``Analysis.extracted``."""
+
+    __tablename__ = "facts"
+    __table_args__ = (
+        Index("ix_facts_project_dataset_metric", "project_id", "dataset", "metric"),
+        Index("ix_facts_dataset_metric", "dataset", "metric"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    project_id = Column(Integer, ForeignKey("projects.id"), nullable=False)
+    paper_id = Column(Integer, ForeignKey("papers.id"), index=True, nullable=False)
+    analysis_id = Column(Integer, ForeignKey("analyses.id"), index=True, nullable=False)
+    dataset = Column(String, nullable=True)
+    metric = Column(String, nullable=True)
+    value = Column(String, nullable=True)
+    value_numeric = Column(Float, nullable=True)
+    setting = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    analysis = relationship("Analysis", back_populates="facts")
@@ -1,27 +1,63 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, JSON, Text, UniqueConstraint
+from sqlalchemy import DDL, Column, Integer, String, DateTime, ForeignKey, Index, JSON, Text, UniqueConstraint, event
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 
 from db.base import Base
 
+# Weighted tsvector over title (A) and abstract (B), kept by Postgres as a
+# generated column; it is not mapped because only Postgres can compute it.
+SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(abstract, '')), 'B')"
+)
+JSONVariant = JSON().with_variant(JSONB(), "postgresql")
+
 
 class Paper(Base):
     __tablename__ = "papers"
-    __table_args__ = (UniqueConstraint("project_id", "arxiv_id", name="uq_project_arxiv"),)
+    __table_args__ = (
+        UniqueConstraint("project_id", "arxiv_id", name="uq_project_arxiv"),
+        Index("ix_papers_authors", "authors", postgresql_using="gin", postgresql_ops={"authors": "jsonb_path_ops"}),
+        Index(
+            "ix_papers_categories",
+            "categories",
+            postgresql_using="gin",
+            postgresql_ops={"categories": "jsonb_path_ops"},
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     project_id = Column(Integer, ForeignKey("projects.id"), index=True, nullable=False)
     arxiv_id = Column(String, nullable=False)
     title = Column(String)
-    authors = Column(JSON)
+    authors = Column(JSONVariant)
     abstract = Column(Text)
-    categories = Column(JSON)
+    categories = Column(JSONVariant)
     published_at = Column(DateTime)
     updated_at = Column(DateTime)
     pdf_url = Column(String)
     local_path = Column(String)
+    pdf_digest = Column(String(64), nullable=True)
+    text_digest = Column(String(64), nullable=True)
     download_status = Column(String, default="pending")
+    stage = Column(String, nullable=True)  # last per-paper stage finished in the current run
+    failed_stage = Column(String, nullable=True)  # per-paper stage that failed in the last run, if any
     created_at = Column(DateTime, default=datetime.utcnow)
 
     project = relationship("Project", back_populates="papers")
     analyses = relationship("Analysis", back_populates="paper", cascade="all, delete-orphan")
+
+
+event.listen(
+    Paper.__table__,
+    "after_create",
+    DDL(
+        f"ALTER TABLE papers ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ({SEARCH_VECTOR_SQL}) STORED"
+    ).execute_if(dialect="postgresql"),
+)
+event.listen(
+    Paper.__table__,
+    "after_create",
+    DDL("CREATE INDEX ix_papers_search_vector ON papers USING gin (search_vector)").execute_if(dialect="postgresql"),
+)
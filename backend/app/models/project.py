@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, JSON, Text
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index, JSON, Text
 from sqlalchemy.orm import relationship
 
 from db.base import Base
@@ -7,6 +7,7 @@ from db.base import Base
 
 class Project(Base):
     __tablename__ = "projects"
+    __table_args__ = (Index("ix_projects_run_queue", "status", "priority", "run_requested_at"),)
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), index=True, nullable=False)
@@ -15,6 +16,13 @@ class Project(Base):
     status = Column(String, default="queued")
     stage = Column(String, default="KEYWORD_EXPAND")
     progress = Column(Integer, default=0)
+    priority = Column(Integer, nullable=True)
+    run_requested_at = Column(DateTime, nullable=True)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    run_mode = Column(String, default="full")
+    batch_id = Column(String, nullable=True)  # shared by the projects of one batch run
+    last_success_at = Column(DateTime, nullable=True)
     config = Column(JSON, default={})
     report_markdown = Column(Text, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
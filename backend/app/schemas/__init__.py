@@ -1,8 +1,9 @@
 from schemas.user import UserCreate, UserOut
 from schemas.token import Token, TokenData
-from schemas.project import ProjectCreate, ProjectOut
-from schemas.paper import PaperOut
+from schemas.project import BatchRunOut, BatchRunRequest, BatchSearchOut, ProjectCreate, ProjectOut
+from schemas.paper import PaperOut, PaperSearchHit, PaperSearchPage
 from schemas.analysis import AnalysisOut
+from schemas.fact import ComparisonRow, FactOut
 from schemas.export import ExportOut
 from schemas.chat import ChatRequest, ChatResponse
 
@@ -13,8 +14,15 @@ __all__ = [
     "TokenData",
     "ProjectCreate",
     "ProjectOut",
+    "BatchRunRequest",
+    "BatchSearchOut",
+    "BatchRunOut",
     "PaperOut",
+    "PaperSearchHit",
+    "PaperSearchPage",
     "AnalysisOut",
+    "FactOut",
+    "ComparisonRow",
     "ExportOut",
     "ChatRequest",
     "ChatResponse",
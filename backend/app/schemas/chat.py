@@ -15,3 +15,4 @@ class ChatRequest(BaseModel):
 class ChatResponse(BaseModel):
     reply: str
     raw: dict | None = None
+    cached: bool = False
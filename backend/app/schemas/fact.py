@@ -0,0 +1,21 @@
+from typing import Optional
+from pydantic import BaseModel
+
+
+class FactOut(BaseModel):
+    paper_id: int
+    paper_title: Optional[str]
+    dataset: Optional[str]
+    metric: Optional[str]
+    value: Optional[str]
+    value_numeric: Optional[float]
+    setting: Optional[str]
+
+
+class ComparisonRow(BaseModel):
+    dataset: Optional[str]
+    metric: Optional[str]
+    papers: int
+    min: Optional[float]
+    max: Optional[float]
+    avg: Optional[float]
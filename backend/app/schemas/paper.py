@@ -13,6 +13,17 @@ class PaperOut(BaseModel):
     published_at: datetime | None
     pdf_url: Optional[str]
     download_status: str
+    failed_stage: Optional[str]
 
     class Config:
         orm_mode = True
+
+
+class PaperSearchHit(PaperOut):
+    project_id: int
+    rank: float = 0.0
+
+
+class PaperSearchPage(BaseModel):
+    items: list[PaperSearchHit]
+    next_cursor: str | None = None
@@ -16,11 +16,13 @@ class RuntimeConfig(BaseModel):
     top_k: int = 6
     download_concurrency: int = 5
     retry: int = 3
+    profile: bool = False  # profile the run in one process and store it as a "profile" export
 
 
 class ProviderConfig(BaseModel):
-    llm: dict = Field(default_factory=lambda: {"name": "mock"})
-    embedding: dict = Field(default_factory=lambda: {"name": "mock"})
+    # Empty or None entries fall back to LLM_PROVIDER / EMBED_PROVIDER and their models.
+    llm: dict = Field(default_factory=dict)
+    embedding: dict = Field(default_factory=dict)
 
 
 class ProjectCreate(BaseModel):
@@ -39,7 +41,28 @@ class ProjectOut(BaseModel):
     stage: str
     progress: int
     config: dict
+    last_success_at: datetime | None = None
     created_at: datetime
 
     class Config:
         orm_mode = True
+
+
+class BatchRunRequest(BaseModel):
+    project_ids: List[int] = Field(..., min_items=1)
+    lane: Optional[str] = None
+    mode: str = "full"
+
+
+class BatchSearchOut(BaseModel):
+    query: str
+    start: int
+    max_results: int
+    project_ids: List[int]
+
+
+class BatchRunOut(BaseModel):
+    task_id: Optional[str]  # None while the batch waits for a run slot
+    status: str
+    project_ids: List[int]
+    searches: List[BatchSearchOut]
@@ -0,0 +1,164 @@
+import json
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable
+
+from sqlalchemy.orm import Session
+
+from infrastructure.metrics import observe_stage
+from models import Paper, Project
+from services.pipeline import PipelineService, refresh_since
+
+
+@dataclass
+class SearchGroup:
+    """One arXiv search covering the result windows of several projects."""
+
+    query: str
+    updated_since: datetime | None
+    start: int
+    end: int
+    # project id -> (start, max_results) of its own window
+    windows: dict[int, tuple[int, int]] = field(default_factory=dict)
+
+    def slice_for(self, project_id: int, results: list) -> list:
+        start, max_results = self.windows[project_id]
+        offset = start - self.start
+        return results[offset:offset + max_results]
+
+
+def normalize_query(topic: str) -> str:
+    return " ".join(topic.lower().split())
+
+
+def plan_searches(projects: list[Project]) -> list[SearchGroup]:
+    """Merge the searches of ``projects``: one per query and cut-off, for overlapping or adjacent windows.
+
+    Queries are compared case- and whitespace-insensitively. Windows that do
+    not touch stay separate searches, so no project pays for results no one asked for.
+    """
+    windows: dict[tuple[str, datetime | None], list[tuple[int, int, Project]]] = {}
+    for project in projects:
+        search_cfg = (project.config or {}).get("search", {})
+        start, max_results = search_cfg.get("start", 0), search_cfg.get("max_results", 5)
+        key = (normalize_query(project.topic), refresh_since(project))
+        windows.setdefault(key, []).append((start, max_results, project))
+
+    groups = []
+    for (_query, since), entries in windows.items():
+        group = None
+        for start, max_results, project in sorted(entries, key=lambda entry: (entry[0], entry[2].id)):
+            if group is None or start > group.end:
+                group = SearchGroup(project.topic, since, start, start + max_results)
+                groups.append(group)
+            group.end = max(group.end, start + max_results)
+            group.windows[project.id] = (start, max_results)
+    return groups
+
+
+def _provider_key(project: Project) -> str:
+    return json.dumps((project.config or {}).get("providers", {}), sort_keys=True, default=str)
+
+
+class BatchRunner:
+    """Run many projects together so searches and per-paper work are shared.
+
+    Each merged search runs once. Papers are then grouped by (provider config,
+    arXiv id, version); only the first paper of a group is downloaded, embedded
+    and extracted, with embeddings and LLM calls batched across all groups,
+    and the results are copied to the same paper in the other projects.
+    WRITE/EXPORT stay per project.
+    """
+
+    def __init__(
+        self, db: Session, service_for: Callable[[Project], PipelineService], embed_batch_size: int = 256
+    ):
+        self.db = db
+        self.service_for = service_for
+        self.embed_batch_size = embed_batch_size
+
+    def run(self, projects: list[Project]):
+        services = {project.id: self.service_for(project) for project in projects}
+        try:
+            self._run(projects, services)
+        except Exception as exc:  # noqa: BLE001
+            services[projects[0].id].rollback()
+            for project in projects:
+                if project.status not in ("completed", "failed"):
+                    services[project.id].fail(project, str(exc))
+            raise
+
+    def _run(self, projects: list[Project], services: dict[int, PipelineService]):
+        results = {}
+        for group in plan_searches(projects):
+            service = services[next(iter(group.windows))]
+            try:
+                with observe_stage("ARXIV_SEARCH"):
+                    found = service.arxiv.search(
+                        group.query, group.start, group.end - group.start, updated_since=group.updated_since
+                    )
+            except Exception as exc:  # noqa: BLE001
+                for project in projects:
+                    if project.id in group.windows:
+                        services[project.id].fail(project, str(exc))
+                continue
+            for project_id in group.windows:
+                results[project_id] = group.slice_for(project_id, found)
+
+        units: dict[str, dict[tuple, list[tuple[Project, Paper]]]] = {}
+        active = []
+        for project in projects:
+            if project.id not in results:
+                continue
+            service = services[project.id]
+            try:
+                paper_ids = set(service.prepare(project, results[project.id]))
+            except Exception as exc:  # noqa: BLE001
+                service.fail(project, str(exc))
+                continue
+            active.append(project)
+            provider_units = units.setdefault(_provider_key(project), {})
+            for paper in project.papers:
+                if paper.id in paper_ids and paper.failed_stage is None:
+                    provider_units.setdefault((paper.arxiv_id, paper.updated_at), []).append((project, paper))
+
+        stages = [("DOWNLOAD", 40), ("PARSE", 50), ("CHUNK", 60), ("EMBED", 70), ("RETRIEVE", 75), ("EXTRACT", 85)]
+        for stage, progress in stages:
+            for project in active:
+                services[project.id].update_stage(project, stage, progress)
+            if stage not in ("DOWNLOAD", "EMBED", "EXTRACT"):
+                continue
+            for provider_units in units.values():
+                live = [members for members in provider_units.values() if members[0][1].failed_stage is None]
+                if live:
+                    self._run_stage(services[live[0][0][0].id], stage, live)
+
+        for project in active:
+            service = services[project.id]
+            try:
+                service.finalize(project)
+            except Exception as exc:  # noqa: BLE001
+                service.fail(project, str(exc))
+
+    def _run_stage(self, service: PipelineService, stage: str, units: list[list[tuple[Project, Paper]]]):
+        sources = [members[0] for members in units]
+        if stage == "DOWNLOAD":
+            errors = {}
+            for project, paper in sources:
+                try:
+                    service.download_paper(project, paper)
+                except Exception as exc:  # noqa: BLE001
+                    service.rollback()
+                    errors[paper.id] = str(exc)
+        elif stage == "EMBED":
+            errors = service.index_papers(sources, self.embed_batch_size)
+        else:
+            errors = service.extract_papers(sources)
+
+        for members in units:
+            (_project, source), copies = members[0], members[1:]
+            if source.id in errors:
+                for project, paper in members:
+                    service.mark_paper_failed(project, paper, stage, errors[source.id])
+            else:
+                service.share_paper_stage(stage, source, copies)
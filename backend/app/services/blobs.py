@@ -0,0 +1,91 @@
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from core.config import get_settings
+from infrastructure.blobstore import BlobStore
+from models import Blob, Project
+
+_settings = get_settings()
+blob_store = BlobStore(str(Path(_settings.storage_root) / "blobs"), _settings.blob_compression_level)
+
+
+def _incref(db: Session, digest: str, size: int, compression: str | None):
+    values = {Blob.refcount: Blob.refcount + 1, Blob.last_referenced_at: datetime.utcnow()}
+    if db.query(Blob).filter(Blob.digest == digest).update(values, synchronize_session=False):
+        return
+    try:
+        with db.begin_nested():
+            db.add(Blob(digest=digest, size=size, compression=compression, refcount=1))
+    except IntegrityError:
+        # Another writer inserted the same content first.
+        db.query(Blob).filter(Blob.digest == digest).update(values, synchronize_session=False)
+
+
+def store_blob(db: Session, data: bytes, compress: bool = False) -> Blob:
+    """Take one reference on ``data`` and make sure its file exists (committed by the caller).
+
+    The reference is taken first: its row lock makes a concurrent
+    ``collect_garbage`` either skip the blob or finish deleting it before the
+    file is written again.
+    """
+    digest = blob_store.digest(data)
+    _incref(db, digest, len(data), blob_store.compression_for(compress))
+    blob = db.get(Blob, digest)
+    blob_store.put(data, compress=blob.compression is not None)
+    return blob
+
+
+def retain_blobs(db: Session, digests):
+    """Take one more reference per occurrence of each already stored digest (committed by the caller)."""
+    for digest, count in Counter(d for d in digests if d).items():
+        db.query(Blob).filter(Blob.digest == digest).update(
+            {Blob.refcount: Blob.refcount + count, Blob.last_referenced_at: datetime.utcnow()},
+            synchronize_session=False,
+        )
+
+
+def release_blobs(db: Session, digests):
+    """Drop one reference per occurrence of each digest (committed by the caller)."""
+    for digest, count in Counter(d for d in digests if d).items():
+        db.query(Blob).filter(Blob.digest == digest).update(
+            {Blob.refcount: Blob.refcount - count}, synchronize_session=False
+        )
+
+
+def project_blob_digests(project: Project) -> list[str]:
+    digests = [export.blob_digest for export in project.exports]
+    for paper in project.papers:
+        digests.extend([paper.pdf_digest, paper.text_digest])
+    return [digest for digest in digests if digest]
+
+
+def blob_path(db: Session, digest: str) -> Path | None:
+    blob = db.get(Blob, digest)
+    return blob_store.path(blob.digest, blob.compression) if blob else None
+
+
+def read_blob(db: Session, digest: str) -> bytes:
+    blob = db.get(Blob, digest)
+    if blob is None:
+        raise FileNotFoundError(digest)
+    return blob_store.read(blob.digest, blob.compression)
+
+
+def collect_garbage(db: Session, digests=None) -> int:
+    """Delete unreferenced blobs (only among ``digests`` when given); returns how many were removed."""
+    query = db.query(Blob.digest).filter(Blob.refcount <= 0)
+    if digests is not None:
+        query = query.filter(Blob.digest.in_(set(digests)))
+    removed = 0
+    for (digest,) in query.all():
+        blob = db.query(Blob).filter(Blob.digest == digest, Blob.refcount <= 0).with_for_update().first()
+        if blob is not None:
+            blob_store.delete(blob.digest, blob.compression)
+            db.delete(blob)
+            removed += 1
+        db.commit()
+    return removed
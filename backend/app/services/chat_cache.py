@@ -0,0 +1,150 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import numpy as np
+
+from core.config import get_settings
+from infrastructure.embedding import EmbeddingProvider
+from infrastructure.metrics import CACHE_REQUESTS
+from infrastructure.registry import provider_registry
+
+
+@dataclass
+class CachedReply:
+    reply: str
+    raw: dict | None
+    scope: str
+    expires_at: float
+
+
+def normalize_text(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def cache_text(messages: list[dict[str, str]], context_messages: int) -> str | None:
+    """Normalized last user message, preceded by up to ``context_messages`` earlier turns."""
+    for index in range(len(messages) - 1, -1, -1):
+        if messages[index].get("role") == "user":
+            break
+    else:
+        return None
+    context = messages[max(0, index - context_messages):index]
+    lines = [f"{m.get('role', '')}: {normalize_text(m.get('content', ''))}" for m in context]
+    lines.append(f"user: {normalize_text(messages[index].get('content', ''))}")
+    return "\n".join(lines)
+
+
+class SemanticChatCache:
+    """In-memory nearest-neighbour cache of chat replies.
+
+    Each entry is stored as an L2-normalized embedding row; a lookup is one
+    matrix-vector product over the rows of the same scope (model). Entries
+    expire after ``ttl_seconds`` and the least recently used one is evicted
+    once ``max_entries`` is reached.
+    """
+
+    def __init__(
+        self,
+        embedder: EmbeddingProvider,
+        threshold: float = 0.95,
+        max_entries: int = 1024,
+        ttl_seconds: float = 3600,
+        context_messages: int = 2,
+    ):
+        self.embedder = embedder
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.context_messages = context_messages
+        self._vectors: np.ndarray | None = None
+        self._active = np.zeros(max_entries, dtype=bool)
+        self._scopes = np.empty(max_entries, dtype=object)
+        self._entries: OrderedDict[int, CachedReply] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _embed(self, text: str) -> np.ndarray:
+        return self.embedder.embed_array([text], normalize=True)[0]
+
+    def lookup(self, messages: list[dict[str, str]], scope: str) -> CachedReply | None:
+        text = cache_text(messages, self.context_messages)
+        if text is None:
+            return None
+        query = self._embed(text)
+        with self._lock:
+            entry = self._nearest(query, scope)
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        CACHE_REQUESTS.labels("chat", "miss" if entry is None else "hit").inc()
+        return entry
+
+    def store(self, messages: list[dict[str, str]], scope: str, reply: str, raw: dict | None = None):
+        text = cache_text(messages, self.context_messages)
+        if text is None or not reply:
+            return
+        vector = self._embed(text)
+        with self._lock:
+            if self._vectors is None or self._vectors.shape[1] != vector.shape[0]:
+                self._vectors = np.zeros((self.max_entries, vector.shape[0]), dtype=np.float32)
+                self._active[:] = False
+                self._entries.clear()
+            slot = self._free_slot()
+            self._vectors[slot] = vector
+            self._active[slot] = True
+            self._scopes[slot] = scope
+            self._entries[slot] = CachedReply(reply, raw, scope, time.monotonic() + self.ttl_seconds)
+
+    def _nearest(self, query: np.ndarray, scope: str) -> CachedReply | None:
+        if self._vectors is None or self._vectors.shape[1] != query.shape[0]:
+            return None
+        now = time.monotonic()
+        while True:
+            mask = self._active & (self._scopes == scope)
+            if not mask.any():
+                return None
+            similarities = np.where(mask, self._vectors @ query, -np.inf)
+            slot = int(np.argmax(similarities))
+            if similarities[slot] < self.threshold:
+                return None
+            entry = self._entries[slot]
+            if entry.expires_at > now:
+                self._entries.move_to_end(slot)
+                return entry
+            self._evict(slot)
+
+    def _free_slot(self) -> int:
+        if len(self._entries) >= self.max_entries:
+            self._evict(next(iter(self._entries)))
+        return int(np.argmin(self._active))
+
+    def _evict(self, slot: int):
+        self._entries.pop(slot, None)
+        self._active[slot] = False
+        self.evictions += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+def build_chat_cache() -> SemanticChatCache:
+    settings = get_settings()
+    return SemanticChatCache(
+        provider_registry.embedding(),
+        threshold=settings.chat_cache_threshold,
+        max_entries=settings.chat_cache_max_entries,
+        ttl_seconds=settings.chat_cache_ttl_seconds,
+        context_messages=settings.chat_cache_context_messages,
+    )
@@ -1,36 +1,115 @@
 from __future__ import annotations
 
-from typing import Any
-
-import httpx
+import importlib.util
+import json
+from typing import TYPE_CHECKING, Any, AsyncIterator
 
 from core.config import get_settings
+from infrastructure.metrics import observe_call
 
+if TYPE_CHECKING:
+    import httpx
+
+NOT_CONFIGURED_REPLY = "Coze Agent 服务未配置，请设置 COZE_BASE_URL 与 COZE_API_KEY。"
+
+_client: httpx.AsyncClient | None = None
+
+
+def _build_client() -> httpx.AsyncClient:
+    import httpx
 
-async def chat_with_coze(messages: list[dict[str, str]], model: str | None, temperature: float | None) -> dict:
     settings = get_settings()
-    if not settings.coze_base_url or not settings.coze_api_key:
-        return {
-            "reply": "Coze Agent 服务未配置，请设置 COZE_BASE_URL 与 COZE_API_KEY。",
-            "raw": None,
-        }
+    limits = httpx.Limits(
+        max_connections=settings.coze_max_connections,
+        max_keepalive_connections=settings.coze_max_keepalive_connections,
+        keepalive_expiry=settings.coze_keepalive_expiry,
+    )
+    # HTTP/2 needs the optional h2 package; fall back to pooled HTTP/1.1 without it.
+    http2 = settings.coze_http2 and importlib.util.find_spec("h2") is not None
+    return httpx.AsyncClient(timeout=settings.coze_timeout, limits=limits, http2=http2)
+
+
+def get_coze_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _build_client()
+    return _client
+
+
+async def start_coze_client():
+    if coze_configured():
+        get_coze_client()
+
+
+async def close_coze_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
 
+
+def coze_configured() -> bool:
+    settings = get_settings()
+    return bool(settings.coze_base_url and settings.coze_api_key)
+
+
+def _request_args(messages: list[dict[str, str]], model: str | None, temperature: float | None, stream: bool):
+    settings = get_settings()
     payload: dict[str, Any] = {
         "model": model or settings.coze_model,
         "messages": messages,
     }
     if temperature is not None:
         payload["temperature"] = temperature
-
+    if stream:
+        payload["stream"] = True
     headers = {"Authorization": f"Bearer {settings.coze_api_key}"}
     url = settings.coze_base_url.rstrip("/") + "/v1/chat/completions"
-    async with httpx.AsyncClient(timeout=30) as client:
-        response = await client.post(url, json=payload, headers=headers)
+    return url, payload, headers
+
+
+async def chat_with_coze(messages: list[dict[str, str]], model: str | None, temperature: float | None) -> dict:
+    if not coze_configured():
+        return {
+            "reply": NOT_CONFIGURED_REPLY,
+            "raw": None,
+        }
+
+    url, payload, headers = _request_args(messages, model, temperature, stream=False)
+    with observe_call("coze", "chat"):
+        response = await get_coze_client().post(url, json=payload, headers=headers)
         response.raise_for_status()
-        data = response.json()
+    data = response.json()
     reply = (
         data.get("choices", [{}])[0]
         .get("message", {})
         .get("content", "")
     )
     return {"reply": reply, "raw": data}
+
+
+async def stream_chat_with_coze(
+    messages: list[dict[str, str]], model: str | None, temperature: float | None
+) -> AsyncIterator[str]:
+    """Yield reply text deltas as the OpenAI-compatible SSE stream delivers them."""
+    if not coze_configured():
+        yield NOT_CONFIGURED_REPLY
+        return
+
+    url, payload, headers = _request_args(messages, model, temperature, stream=True)
+    with observe_call("coze", "chat_stream"):
+        async with get_coze_client().stream("POST", url, json=payload, headers=headers) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    return
+                try:
+                    chunk = json.loads(data)
+                except ValueError:
+                    continue
+                delta = chunk.get("choices", [{}])[0].get("delta", {}).get("content")
+                if delta:
+                    yield delta
@@ -0,0 +1,99 @@
+import re
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from models import Analysis, Fact, Paper
+
+_NUMBER = re.compile(r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?")
+
+
+def _name(item) -> str | None:
+    if isinstance(item, dict):
+        item = item.get("name")
+    if item is None:
+        return None
+    return str(item).strip() or None
+
+
+def parse_number(value) -> float | None:
+    """First number in a reported value (``"91.2%"`` -> 91.2), or None."""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    match = _NUMBER.search(str(value or ""))
+    return float(match.group()) if match else None
+
+
+def extract_facts(extracted: dict | None) -> list[dict]:
+    """Flatten ``datasets``/``metrics`` of one extraction into fact rows.
+
+    Every dataset gets a row without a metric, so "which papers used X" is a
+    plain lookup. A metric is attributed to its own ``dataset`` field when the
+    extraction names one, otherwise to the paper's only dataset, if it has one.
+    """
+    extracted = extracted or {}
+    datasets = [name for name in map(_name, extracted.get("datasets") or []) if name]
+    facts = [{"dataset": name} for name in dict.fromkeys(datasets)]
+    default_dataset = datasets[0] if len(set(datasets)) == 1 else None
+    for metric in extracted.get("metrics") or []:
+        if not isinstance(metric, dict) or not _name(metric):
+            continue
+        value = metric.get("value")
+        facts.append(
+            {
+                "dataset": _name(metric.get("dataset")) or default_dataset,
+                "metric": _name(metric),
+                "value": None if value is None else str(value),
+                "value_numeric": parse_number(value),
+                "setting": None if metric.get("setting") is None else str(metric["setting"]),
+            }
+        )
+    return facts
+
+
+def add_facts(analysis: Analysis):
+    """Attach the facts of a freshly written analysis (committed with it by the caller)."""
+    for fact in extract_facts(analysis.extracted):
+        analysis.facts.append(Fact(project_id=analysis.project_id, paper_id=analysis.paper_id, **fact))
+
+
+def compare(db: Session, project_id: int, dataset: str | None = None, metric: str | None = None) -> list[dict]:
+    """Per (dataset, metric) paper counts and numeric value ranges, aggregated in SQL."""
+    query = db.query(
+        Fact.dataset,
+        Fact.metric,
+        func.count(func.distinct(Fact.paper_id)),
+        func.min(Fact.value_numeric),
+        func.max(Fact.value_numeric),
+        func.avg(Fact.value_numeric),
+    ).filter(Fact.project_id == project_id)
+    if dataset:
+        query = query.filter(Fact.dataset == dataset)
+    if metric:
+        query = query.filter(Fact.metric == metric)
+    rows = query.group_by(Fact.dataset, Fact.metric).order_by(Fact.dataset, Fact.metric).all()
+    return [
+        {
+            "dataset": row[0],
+            "metric": row[1],
+            "papers": row[2],
+            "min": row[3],
+            "max": row[4],
+            "avg": None if row[5] is None else float(row[5]),
+        }
+        for row in rows
+    ]
+
+
+def facts_for(db: Session, project_id: int, dataset: str | None = None, metric: str | None = None):
+    """Per-paper fact rows, best numeric value first."""
+    query = (
+        db.query(Fact, Paper.title)
+        .join(Paper, Fact.paper_id == Paper.id)
+        .filter(Fact.project_id == project_id)
+    )
+    if dataset:
+        query = query.filter(Fact.dataset == dataset)
+    if metric:
+        query = query.filter(Fact.metric == metric)
+    return query.order_by(Fact.value_numeric.desc().nulls_last(), Fact.paper_id).all()
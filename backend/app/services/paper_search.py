@@ -0,0 +1,88 @@
+import base64
+import json
+
+from sqlalchemy import String, cast, func, literal, literal_column, or_, tuple_
+from sqlalchemy.dialects.postgresql import DOUBLE_PRECISION, JSONB
+from sqlalchemy.orm import Session
+
+from models import Paper, Project
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(rank: float, paper_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps([rank, paper_id]).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[float, int]:
+    try:
+        rank, paper_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return float(rank), int(paper_id)
+    except (ValueError, TypeError) as exc:
+        raise InvalidCursor("Invalid cursor") from exc
+
+
+def _substring_pattern(text: str) -> str:
+    """A LIKE pattern matching ``text`` literally anywhere; use with ``escape="\\"``."""
+    escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def _contains(column, value: str, postgres: bool):
+    if postgres:
+        # Served by the jsonb_path_ops GIN index.
+        return column.op("@>")(cast(json.dumps([value]), JSONB))
+    return cast(column, String).like(_substring_pattern(json.dumps(value)), escape="\\")
+
+
+def search_papers(
+    db: Session,
+    user_id: int,
+    q: str | None = None,
+    category: str | None = None,
+    author: str | None = None,
+    limit: int = 20,
+    cursor: str | None = None,
+) -> tuple[list[tuple[Paper, float]], str | None]:
+    """Rank the user's papers against ``q``; returns one page and the cursor of the next.
+
+    Postgres matches ``websearch_to_tsquery`` against the generated
+    ``search_vector`` column and orders by ``ts_rank_cd``; other databases
+    fall back to a substring match with a constant rank. Pages are keyed on
+    (rank, id) so deep pages cost the same as the first one.
+    """
+    postgres = db.get_bind().dialect.name == "postgresql"
+    query = db.query(Paper).join(Project, Paper.project_id == Project.id).filter(Project.user_id == user_id)
+    rank = literal(0.0)
+    ranked = postgres and bool(q)
+    if q:
+        if postgres:
+            vector = literal_column("papers.search_vector")
+            tsquery = func.websearch_to_tsquery("english", q)
+            # ts_rank_cd returns float4; as float8 the rank survives the cursor's
+            # round trip through a Python float exactly, so keyset comparisons match.
+            rank = cast(func.ts_rank_cd(vector, tsquery), DOUBLE_PRECISION)
+            query = query.filter(vector.op("@@")(tsquery))
+        else:
+            pattern = _substring_pattern(q)
+            query = query.filter(
+                or_(Paper.title.ilike(pattern, escape="\\"), Paper.abstract.ilike(pattern, escape="\\"))
+            )
+    if category:
+        query = query.filter(_contains(Paper.categories, category, postgres))
+    if author:
+        query = query.filter(_contains(Paper.authors, author, postgres))
+    if cursor:
+        last_rank, last_id = decode_cursor(cursor)
+        if ranked:
+            query = query.filter(tuple_(rank, Paper.id) < tuple_(last_rank, last_id))
+        else:
+            query = query.filter(Paper.id < last_id)
+
+    order = [rank.desc(), Paper.id.desc()] if ranked else [Paper.id.desc()]
+    rows = query.add_columns(rank).order_by(*order).limit(limit + 1).all()
+    hits = [(paper, float(score)) for paper, score in rows[:limit]]
+    next_cursor = encode_cursor(hits[-1][1], hits[-1][0].id) if len(rows) > limit else None
+    return hits, next_cursor
@@ -1,14 +1,20 @@
+import re
+import time
 from datetime import datetime
 from typing import List
 
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
+from core.config import get_settings
 from infrastructure.arxiv import ArxivAdapter, MockArxivAdapter
 from infrastructure.llm import LLMProvider, MockLLMProvider
+from infrastructure.metrics import CHUNKS, PAPERS, STAGE_SECONDS, observe_stage
 from infrastructure.embedding import EmbeddingProvider, MockEmbeddingProvider
-from infrastructure.pubsub import publish_project_event
+from infrastructure.pubsub import BufferedEventPublisher, event_publisher
 from models import Analysis, Export, Paper, Project
-from utils.files import project_storage_path
+from services.blobs import blob_store, release_blobs, retain_blobs, store_blob
+from services.facts import add_facts
 
 STAGES = [
     "KEYWORD_EXPAND",
@@ -26,6 +32,54 @@ STAGES = [
     "DONE",
 ]
 
+FULL = "full"
+REFRESH = "refresh"  # only papers submitted or revised since the last successful run
+RUN_MODES = (FULL, REFRESH)
+
+# Per-paper stages in the order a paper passes them; ``Paper.stage`` holds the
+# last one it finished in the current run (SELECTED until its download ends).
+SELECTED = "TOPK_SELECT"
+PAPER_STAGES = ("DOWNLOAD", "EMBED", "EXTRACT")
+# Project progress while the per-paper stages run, from DOWNLOAD to EXTRACT.
+PAPER_PROGRESS = (40, 85)
+
+# Each section records the papers it was written from, so a refresh can tell
+# when one has moved in or out of it.
+_SECTION_MARKER = "<!-- section:{} papers:{} -->"
+_SECTION_SPLIT = re.compile(r"^<!-- section:(\S+?)(?: papers:([\d,]*))? -->\n", re.MULTILINE)
+
+
+def report_sections(markdown: str | None) -> dict[str, str]:
+    """Section bodies of a report written by ``PipelineService``, keyed by section name."""
+    parts = _SECTION_SPLIT.split(markdown or "")
+    return {key: body.strip("\n") for key, body in zip(parts[1::3], parts[3::3])}
+
+
+def _section_papers(markdown: str | None) -> dict[str, set[int] | None]:
+    """Ids of the papers each section was written from (None for reports that predate them)."""
+    parts = _SECTION_SPLIT.split(markdown or "")
+    return {
+        key: None if ids is None else {int(paper_id) for paper_id in ids.split(",") if paper_id}
+        for key, ids in zip(parts[1::3], parts[2::3])
+    }
+
+
+def refresh_since(project: Project) -> datetime | None:
+    """Cut-off of a refresh run (its last successful run), or None for a full run."""
+    return project.last_success_at if project.run_mode == REFRESH else None
+
+
+def section_key(paper: Paper) -> str:
+    """Report section a paper belongs to: its primary arXiv category."""
+    return (paper.categories or ["uncategorized"])[0]
+
+
+def chunk_text(text: str, size: int = 1000, overlap: int = 100) -> list[str]:
+    if not text:
+        return []
+    step = max(1, size - overlap)
+    return [text[start:start + size] for start in range(0, max(len(text) - overlap, 1), step)]
+
 
 class PipelineService:
     def __init__(
@@ -34,79 +88,390 @@ class PipelineService:
         arxiv_adapter: ArxivAdapter | None = None,
         llm_provider: LLMProvider | None = None,
         embed_provider: EmbeddingProvider | None = None,
+        publisher: BufferedEventPublisher | None = None,
+        profiler=None,
     ):
         self.db = db
         self.arxiv = arxiv_adapter or MockArxivAdapter()
         self.llm = llm_provider or MockLLMProvider()
         self.embed = embed_provider or MockEmbeddingProvider()
+        self.publisher = publisher or event_publisher
+        self.profiler = profiler
+        self.stage_commit_interval = get_settings().stage_commit_interval_seconds
+        self._last_stage_commit = 0.0
 
-    def _update_stage(self, project: Project, stage: str, progress: int):
+    def update_stage(self, project: Project, stage: str, progress: int):
+        if self.profiler is not None:
+            self.profiler.enter_stage(stage)
         project.stage = stage
         project.progress = progress
         project.updated_at = datetime.utcnow()
         self.db.add(project)
-        self.db.commit()
-        publish_project_event(project.id, "stage", {"stage": stage, "progress": progress})
+        # Write-behind: stage changes ride along with the next commit unless the
+        # last stage commit is older than the configured interval.
+        now = time.monotonic()
+        unsaved = self.db.info.setdefault("unsaved_stages", {})
+        if now - self._last_stage_commit >= self.stage_commit_interval:
+            self.db.commit()
+            self._last_stage_commit = now
+            unsaved.clear()
+        else:
+            unsaved[project.id] = (project, stage, progress, project.updated_at)
+        self.publisher.publish(project.id, "stage", {"stage": stage, "progress": progress})
+
+    def rollback(self):
+        """Roll back the session, keeping the stage writes that were still waiting for a commit."""
+        unsaved = self.db.info.get("unsaved_stages", {})
+        self.db.rollback()
+        for project, stage, progress, updated_at in unsaved.values():
+            project.stage, project.progress, project.updated_at = stage, progress, updated_at
+
+    def _paper_event(self, project: Project, paper: Paper, stage: str):
+        self.publisher.publish(project.id, "paper", {"paper_id": paper.id, "stage": stage})
 
     def run(self, project: Project):
+        """Run every stage in-process; the worker fans the per-paper stages out instead."""
+        paper_ids = self.prepare(project)
+        papers = [paper for paper in project.papers if paper.id in set(paper_ids)]
+
+        self.update_stage(project, "DOWNLOAD", 40)
+        self._run_paper_stage(project, papers, "DOWNLOAD", self.download_paper)
+        self.update_stage(project, "PARSE", 50)
+        self.update_stage(project, "CHUNK", 60)
+        self.update_stage(project, "EMBED", 70)
+        self._run_paper_stage(project, papers, "EMBED", self.index_paper)
+
+        self.update_stage(project, "RETRIEVE", 75)
+
+        # EXTRACT
+        self.update_stage(project, "EXTRACT", 85)
+        self._run_paper_stage(project, papers, "EXTRACT", self.extract_paper)
+
+        self.finalize(project)
+
+    def _run_paper_stage(self, project: Project, papers: list[Paper], stage: str, method):
+        # Like the worker's per-paper tasks: a failing paper is recorded and skipped.
+        for paper in papers:
+            if paper.failed_stage is not None:
+                continue
+            try:
+                method(project, paper)
+            except Exception as exc:  # noqa: BLE001
+                self.mark_paper_failed(project, paper, stage, str(exc))
+
+    def is_refresh(self, project: Project) -> bool:
+        return refresh_since(project) is not None
+
+    def prepare(self, project: Project, results: List | None = None) -> list[int]:
+        """KEYWORD_EXPAND through TOPK_SELECT; returns the ids of the papers to process.
+
+        A refresh searches only for papers updated since the last successful
+        run and returns just the new or revised ones, plus those an earlier run
+        failed on. ``results`` skips the search with ones already fetched (see
+        ``services.batch``).
+        """
         project.status = "running"
+        project.started_at = datetime.utcnow()
         self.db.commit()
+        self._last_stage_commit = time.monotonic()
         # KEYWORD_EXPAND (mock)
-        self._update_stage(project, "KEYWORD_EXPAND", 5)
+        self.update_stage(project, "KEYWORD_EXPAND", 5)
         keywords = project.keywords or []
 
         # ARXIV_SEARCH
-        self._update_stage(project, "ARXIV_SEARCH", 10)
+        self.update_stage(project, "ARXIV_SEARCH", 10)
         search_cfg = (project.config or {}).get("search", {})
-        results = self.arxiv.search(project.topic, search_cfg.get("start", 0), search_cfg.get("max_results", 5))
+        refresh = self.is_refresh(project)
+        if results is None:
+            with observe_stage("ARXIV_SEARCH"):
+                results = self.arxiv.search(
+                    project.topic,
+                    search_cfg.get("start", 0),
+                    search_cfg.get("max_results", 5),
+                    updated_since=refresh_since(project),
+                )
 
         # DEDUP + persist papers
-        self._update_stage(project, "DEDUP", 20)
-        self._materialize_papers(project, results)
+        self.update_stage(project, "DEDUP", 20)
+        with observe_stage("DEDUP"):
+            changed_ids = self._materialize_papers(project, results)
 
         # TOPK_SELECT (mock select first N)
-        self._update_stage(project, "TOPK_SELECT", 30)
+        self.update_stage(project, "TOPK_SELECT", 30)
+        if refresh:
+            # New and revised papers are already pending; retry the ones still failed as well.
+            retry = [paper for paper in project.papers if paper.failed_stage is not None]
+            for paper in retry:
+                paper.download_status = "pending"
+                paper.failed_stage = None
+            selected = changed_ids + [paper.id for paper in retry]
+        else:
+            # A full run processes every paper again, including ones an earlier run failed on.
+            for paper in project.papers:
+                paper.download_status = "pending"
+                paper.failed_stage = None
+            selected = [paper.id for paper in project.papers]
+        selected_ids = set(selected)
+        for paper in project.papers:
+            paper.stage = SELECTED if paper.id in selected_ids else None
+        self.db.commit()
+        return selected
 
-        # DOWNLOAD/PARSE/CHUNK/EMBED/RETRIEVE
-        self._update_stage(project, "DOWNLOAD", 40)
-        self._update_stage(project, "PARSE", 50)
-        self._update_stage(project, "CHUNK", 60)
-        self._update_stage(project, "EMBED", 70)
-        self._update_stage(project, "RETRIEVE", 75)
+    def download_paper(self, project: Project, paper: Paper):
+        with observe_stage("DOWNLOAD"):
+            data = self.arxiv.fetch_pdf(paper)
+            if data is not None:
+                blob = store_blob(self.db, data)
+                if paper.pdf_digest:
+                    release_blobs(self.db, [paper.pdf_digest])
+                paper.pdf_digest = blob.digest
+            paper.download_status = "ok"
+            paper.stage = "DOWNLOAD"
+            self.db.commit()
+        PAPERS.labels("DOWNLOAD").inc()
+        self._paper_event(project, paper, "DOWNLOAD")
 
-        # EXTRACT
-        self._update_stage(project, "EXTRACT", 85)
-        for paper in project.papers:
+    def index_paper(self, project: Project, paper: Paper) -> int:
+        # PARSE/CHUNK/EMBED (mock): the abstract stands in for the parsed PDF text
+        with observe_stage("EMBED"):
+            text = paper.abstract or paper.title or ""
+            blob = store_blob(self.db, text.encode("utf-8"), compress=True)
+            if paper.text_digest:
+                release_blobs(self.db, [paper.text_digest])
+            paper.text_digest = blob.digest
+            self.db.commit()
+            chunks = chunk_text(text)
+            if chunks:
+                # Nothing stores the vectors yet: the stage only pays for computing them.
+                self.embed.embed_array(chunks)
+            paper.stage = "EMBED"
+            self.db.commit()
+        PAPERS.labels("EMBED").inc()
+        CHUNKS.inc(len(chunks))
+        self._paper_event(project, paper, "EMBED")
+        return len(chunks)
+
+    def extract_paper(self, project: Project, paper: Paper):
+        with observe_stage("EXTRACT"):
+            tokens_before = self.llm.thread_tokens()
             extracted = self.llm.generate_structured(paper.abstract or "", schema={})
-            analysis = Analysis(
-                project_id=project.id,
-                paper_id=paper.id,
-                extracted=extracted,
-                summary="; ".join(extracted.get("limitations", "") for _ in range(1)),
-                token_cost=10,
-            )
-            self.db.add(analysis)
+            self._replace_analysis(project, paper, extracted, self.llm.thread_tokens() - tokens_before)
+            paper.stage = "EXTRACT"
+            self.db.commit()
+        PAPERS.labels("EXTRACT").inc()
+        self._paper_event(project, paper, "EXTRACT")
+
+    def _replace_analysis(self, project: Project, paper: Paper, extracted: dict, token_cost: int) -> Analysis:
+        for previous in list(paper.analyses):
+            self.db.delete(previous)
+        analysis = Analysis(
+            project_id=project.id,
+            paper_id=paper.id,
+            extracted=extracted,
+            summary="; ".join(extracted.get("limitations", "") for _ in range(1)),
+            token_cost=token_cost,
+        )
+        add_facts(analysis)
+        self.db.add(analysis)
+        return analysis
+
+    def index_papers(self, items: list[tuple[Project, Paper]], batch_size: int = 256) -> dict[int, str]:
+        """``index_paper`` for many papers, embedding their chunks in shared batches.
+
+        Returns the error of every paper whose chunks could not be embedded, by paper id.
+        """
+        started = time.perf_counter()
+        chunks_by_paper = []
+        for _project, paper in items:
+            text = paper.abstract or paper.title or ""
+            blob = store_blob(self.db, text.encode("utf-8"), compress=True)
+            if paper.text_digest:
+                release_blobs(self.db, [paper.text_digest])
+            paper.text_digest = blob.digest
+            chunks_by_paper.append(chunk_text(text))
+        self.db.commit()
+        texts = [chunk for chunks in chunks_by_paper for chunk in chunks]
+        owners = [paper.id for (_project, paper), chunks in zip(items, chunks_by_paper) for _ in chunks]
+        errors = {}
+        # As in ``index_paper``, the vectors are computed and not stored yet.
+        for start in range(0, len(texts), batch_size):
+            try:
+                self.embed.embed_array(texts[start:start + batch_size])
+            except Exception as exc:  # noqa: BLE001
+                errors.update(dict.fromkeys(owners[start:start + batch_size], str(exc)))
+        for _project, paper in items:
+            if paper.id not in errors:
+                paper.stage = "EMBED"
         self.db.commit()
+        self._observe_batch("EMBED", started, len(items))
+        for (project, paper), chunks in zip(items, chunks_by_paper):
+            if paper.id not in errors:
+                PAPERS.labels("EMBED").inc()
+                CHUNKS.inc(len(chunks))
+                self._paper_event(project, paper, "EMBED")
+        return errors
 
-        # WRITE
-        self._update_stage(project, "WRITE", 90)
-        evidence = [paper.abstract or paper.title for paper in project.papers]
-        outline = f"Overview for {project.topic}"
-        project.report_markdown = self.llm.write_markdown(outline, [e for e in evidence if e])
+    def extract_papers(self, items: list[tuple[Project, Paper]]) -> dict[int, str]:
+        """``extract_paper`` for many papers through one concurrent LLM batch; returns errors by paper id."""
+        started = time.perf_counter()
+        prompts = [paper.abstract or "" for _project, paper in items]
+        results = self.llm.generate_structured_batch(prompts, schema={}, return_exceptions=True)
+        errors = {}
+        for (project, paper), (extracted, tokens) in zip(items, results):
+            if isinstance(extracted, Exception):
+                errors[paper.id] = str(extracted)
+                continue
+            self._replace_analysis(project, paper, extracted, tokens)
+            paper.stage = "EXTRACT"
         self.db.commit()
+        self._observe_batch("EXTRACT", started, len(items))
+        for project, paper in items:
+            if paper.id not in errors:
+                PAPERS.labels("EXTRACT").inc()
+                self._paper_event(project, paper, "EXTRACT")
+        return errors
+
+    @staticmethod
+    def _observe_batch(stage: str, started: float, papers: int):
+        # Keep the per-paper meaning of the stage histogram: one mean sample per paper.
+        if papers:
+            per_paper = (time.perf_counter() - started) / papers
+            for _ in range(papers):
+                STAGE_SECONDS.labels(stage).observe(per_paper)
+
+    def share_paper_stage(self, stage: str, source: Paper, copies: list[tuple[Project, Paper]]):
+        """Give ``copies`` (the same arXiv paper in other projects) what ``source`` got from ``stage``.
+
+        Blobs gain a reference per copy; analyses are copied with no token cost
+        of their own, so per-project costs still add up to what was spent.
+        """
+        if not copies:
+            return
+        analysis = max(source.analyses, key=lambda item: item.id) if stage == "EXTRACT" else None
+        for project, paper in copies:
+            if stage == "DOWNLOAD":
+                retain_blobs(self.db, [source.pdf_digest])
+                release_blobs(self.db, [paper.pdf_digest])
+                paper.pdf_digest = source.pdf_digest
+                paper.download_status = source.download_status
+            elif stage == "EMBED":
+                retain_blobs(self.db, [source.text_digest])
+                release_blobs(self.db, [paper.text_digest])
+                paper.text_digest = source.text_digest
+            elif stage == "EXTRACT":
+                self._replace_analysis(project, paper, dict(analysis.extracted), 0)
+            paper.stage = stage
+        self.db.commit()
+        for project, paper in copies:
+            self._paper_event(project, paper, stage)
+
+    def report_paper_progress(self, project: Project):
+        """Move the project's stage and progress on from its papers' (for per-paper tasks).
+
+        The stage is the first per-paper stage some paper has yet to finish;
+        progress grows with the finished (or failed) paper stages. Concurrent
+        tasks only ever move it forward.
+        """
+        rows = (
+            self.db.query(Paper.stage, Paper.failed_stage, func.count(Paper.id))
+            .filter(Paper.project_id == project.id, Paper.stage.isnot(None))
+            .group_by(Paper.stage, Paper.failed_stage)
+            .all()
+        )
+        total = sum(count for _stage, _failed_stage, count in rows)
+        if not total:
+            return
+        finished = [0] * len(PAPER_STAGES)
+        for stage, failed_stage, count in rows:
+            if failed_stage is not None:
+                done = len(PAPER_STAGES)
+            else:
+                done = PAPER_STAGES.index(stage) + 1 if stage in PAPER_STAGES else 0
+            for index in range(done):
+                finished[index] += count
+        stage = next((name for name, count in zip(PAPER_STAGES, finished) if count < total), PAPER_STAGES[-1])
+        low, high = PAPER_PROGRESS
+        progress = low + (high - low) * sum(finished) // (total * len(PAPER_STAGES))
+        values = {Project.stage: stage, Project.progress: progress, Project.updated_at: datetime.utcnow()}
+        moved = (
+            self.db.query(Project)
+            .filter(Project.id == project.id, Project.status == "running", Project.progress < progress)
+            .update(values, synchronize_session=False)
+        )
+        self.db.commit()
+        if moved:
+            self.publisher.publish(project.id, "stage", {"stage": stage, "progress": progress})
+
+    def mark_paper_failed(self, project: Project, paper: Paper, stage: str, error: str):
+        self.rollback()
+        paper.failed_stage = stage
+        if stage == "DOWNLOAD":
+            paper.download_status = "failed"
+        self.db.commit()
+        self.publisher.publish(project.id, "paper", {"paper_id": paper.id, "stage": stage, "error": error})
+
+    def finalize(self, project: Project):
+        """WRITE through DONE, once every paper has been processed."""
+        # WRITE
+        self.update_stage(project, "WRITE", 90)
+        with observe_stage("WRITE"):
+            project.report_markdown = self._write_report(project)
+            self.db.commit()
 
         # EXPORT
-        self._update_stage(project, "EXPORT", 95)
-        self._create_exports(project)
+        self.update_stage(project, "EXPORT", 95)
+        with observe_stage("EXPORT"):
+            self._create_exports(project)
 
         # DONE
         project.status = "completed"
         project.progress = 100
         project.stage = "DONE"
+        project.finished_at = datetime.utcnow()
+        project.last_success_at = project.started_at
+        self.db.commit()
+        self.publisher.publish(project.id, "done", {"status": project.status})
+        self.publisher.flush()
+
+    def fail(self, project: Project, error: str):
+        self.rollback()
+        project.status = "failed"
+        project.finished_at = datetime.utcnow()
         self.db.commit()
-        publish_project_event(project.id, "done", {"status": project.status})
+        self.publisher.publish(project.id, "failed", {"stage": project.stage, "error": error})
+        self.publisher.flush()
+
+    def _write_report(self, project: Project) -> str:
+        """One section per primary category.
+
+        A refresh rewrites only sections with papers analysed in this run, or
+        whose papers changed (a revision moved one to another category).
+        """
+        papers_by_section: dict[str, list[Paper]] = {}
+        for paper in project.papers:
+            papers_by_section.setdefault(section_key(paper), []).append(paper)
+        existing = report_sections(project.report_markdown) if self.is_refresh(project) else {}
+        written_from = _section_papers(project.report_markdown)
+        affected = {
+            section_key(paper)
+            for paper in project.papers
+            if any(analysis.created_at and analysis.created_at >= project.started_at for analysis in paper.analyses)
+        }
+        blocks = [f"# {project.topic}\n"]
+        for key in sorted(papers_by_section):
+            paper_ids = sorted(paper.id for paper in papers_by_section[key])
+            body = existing.get(key)
+            if body is None or key in affected or written_from.get(key) != set(paper_ids):
+                evidence = [paper.abstract or paper.title for paper in papers_by_section[key]]
+                outline = f"Overview for {project.topic}: {key}"
+                body = f"## {key}\n\n" + self.llm.write_markdown(outline, [e for e in evidence if e])
+            marker = _SECTION_MARKER.format(key, ",".join(map(str, paper_ids)))
+            blocks.append(f"{marker}\n{body}\n")
+        return "\n".join(blocks)
 
-    def _materialize_papers(self, project: Project, results: List):
+    def _materialize_papers(self, project: Project, results: List) -> list[int]:
+        """Insert new papers and reset revised ones; returns the ids of both."""
+        changed = []
         for meta in results:
             existing = (
                 self.db.query(Paper)
@@ -114,6 +479,16 @@ class PipelineService:
                 .first()
             )
             if existing:
+                if meta.updated_at and (existing.updated_at is None or meta.updated_at > existing.updated_at):
+                    existing.title = meta.title
+                    existing.authors = meta.authors
+                    existing.abstract = meta.abstract
+                    existing.categories = meta.categories
+                    existing.pdf_url = meta.pdf_url
+                    existing.updated_at = meta.updated_at
+                    existing.download_status = "pending"
+                    existing.failed_stage = None
+                    changed.append(existing)
                 continue
             paper = Paper(
                 project_id=project.id,
@@ -124,17 +499,23 @@ class PipelineService:
                 categories=meta.categories,
                 published_at=meta.published_at,
                 pdf_url=meta.pdf_url,
-                download_status="ok",
+                updated_at=meta.updated_at,
+                download_status="pending",
             )
             self.db.add(paper)
+            changed.append(paper)
         self.db.commit()
         self.db.refresh(project)
+        return [paper.id for paper in changed]
 
     def _create_exports(self, project: Project):
-        storage_dir = project_storage_path(project.id)
-        md_path = f"{storage_dir}/report.md"
-        with open(md_path, "w", encoding="utf-8") as f:
-            f.write(project.report_markdown or "")
-        export_md = Export(project_id=project.id, format="md", local_path=md_path, status="ok")
+        blob = store_blob(self.db, (project.report_markdown or "").encode("utf-8"), compress=True)
+        export_md = Export(
+            project_id=project.id,
+            format="md",
+            local_path=str(blob_store.path(blob.digest, blob.compression)),
+            blob_digest=blob.digest,
+            status="ok",
+        )
         self.db.add(export_md)
         self.db.commit()
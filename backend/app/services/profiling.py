@@ -0,0 +1,103 @@
+import cProfile
+import io
+import json
+import pstats
+import resource
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from sqlalchemy.orm import Session
+
+from models import Export, Project
+from services.blobs import blob_store, store_blob
+
+PROFILE_FORMAT = "profile"
+
+
+def _rss_bytes() -> int:
+    """Current resident set size; falls back to the peak where /proc is unavailable."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * resource.getpagesize()
+    except (OSError, ValueError, IndexError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class RunProfiler:
+    """cProfile capture of a whole run plus wall/CPU/RSS per pipeline stage.
+
+    ``PipelineService`` calls ``enter_stage`` on every stage change only when a
+    profiler is attached, so unprofiled runs pay nothing.
+    """
+
+    def __init__(self, top: int = 60):
+        self.top = top
+        self.stages: list[dict] = []
+        self._current: dict | None = None
+        self._profile = cProfile.Profile()
+        self._started_at: datetime | None = None
+        self._wall = self._cpu = 0.0
+
+    def enter_stage(self, stage: str):
+        self._close_stage()
+        self._current = {
+            "stage": stage,
+            "_wall": time.perf_counter(),
+            "_cpu": time.process_time(),
+            "rss_start_bytes": _rss_bytes(),
+        }
+
+    def _close_stage(self):
+        if self._current is None:
+            return
+        stage = self._current
+        self.stages.append(
+            {
+                "stage": stage["stage"],
+                "wall_seconds": round(time.perf_counter() - stage["_wall"], 6),
+                "cpu_seconds": round(time.process_time() - stage["_cpu"], 6),
+                "rss_start_bytes": stage["rss_start_bytes"],
+                "rss_end_bytes": _rss_bytes(),
+            }
+        )
+        self._current = None
+
+    @contextmanager
+    def capture(self):
+        self._started_at = datetime.utcnow()
+        wall, cpu = time.perf_counter(), time.process_time()
+        self._profile.enable()
+        try:
+            yield self
+        finally:
+            self._profile.disable()
+            self._close_stage()
+            self._wall = time.perf_counter() - wall
+            self._cpu = time.process_time() - cpu
+
+    def report(self) -> dict:
+        out = io.StringIO()
+        pstats.Stats(self._profile, stream=out).sort_stats("cumulative").print_stats(self.top)
+        return {
+            "started_at": self._started_at.isoformat() if self._started_at else None,
+            "wall_seconds": round(self._wall, 6),
+            "cpu_seconds": round(self._cpu, 6),
+            "peak_rss_bytes": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+            "stages": self.stages,
+            "cprofile": out.getvalue(),
+        }
+
+
+def save_profile_export(db: Session, project: Project, report: dict) -> Export:
+    blob = store_blob(db, json.dumps(report, indent=2).encode("utf-8"), compress=True)
+    export = Export(
+        project_id=project.id,
+        format=PROFILE_FORMAT,
+        local_path=str(blob_store.path(blob.digest, blob.compression)),
+        blob_digest=blob.digest,
+        status="ok",
+    )
+    db.add(export)
+    db.commit()
+    return export
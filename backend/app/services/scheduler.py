@@ -0,0 +1,243 @@
+import math
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+from sqlalchemy import String, and_, cast, func, not_, or_
+from sqlalchemy.orm import Session
+
+from core.config import get_settings
+from infrastructure.pubsub import event_publisher
+from models import Project, User
+
+# Celery priority per lane; with the Redis broker a lower number is served first.
+LANES = {"interactive": 0, "bulk": 6}
+PRIORITY_STEPS = list(range(10))
+PENDING = "pending"  # waiting for one of the user's run slots
+SCHEDULED = "scheduled"  # handed to Celery, waiting for a worker
+ACTIVE_STATUSES = (SCHEDULED, "running")
+# Runs counted for slots and queue positions: a batch is one run, however many projects it holds.
+_RUN_UNITS = func.count(func.distinct(func.coalesce(Project.batch_id, cast(Project.id, String))))
+# A running project bumps ``updated_at`` at most this often from its paper tasks.
+LEASE_RENEW_SECONDS = 60
+
+
+def lane_name(priority: int | None) -> str | None:
+    for name, value in LANES.items():
+        if value == priority:
+            return name
+    return None
+
+
+def choose_lane(project: Project, requested: str | None = None) -> str:
+    if requested in LANES:
+        return requested
+    settings = get_settings()
+    search_cfg = (project.config or {}).get("search", {})
+    runtime_cfg = (project.config or {}).get("runtime", {})
+    size = min(search_cfg.get("max_results", 5), runtime_cfg.get("max_papers", search_cfg.get("max_results", 5)))
+    return "interactive" if size <= settings.interactive_max_papers else "bulk"
+
+
+def request_run(db: Session, project: Project, lane: str | None = None, mode: str = "full") -> str | None:
+    """Queue a run of ``project`` and start it at once if its owner has a free slot.
+
+    Returns the Celery task id when the run was dispatched immediately.
+    """
+    project.status = PENDING
+    project.run_mode = mode
+    project.batch_id = None
+    project.priority = LANES[choose_lane(project, lane)]
+    project.run_requested_at = datetime.utcnow()
+    project.started_at = None
+    project.finished_at = None
+    db.commit()
+    task_ids = dispatch_pending(db, project.user_id)
+    return task_ids.get(project.id)
+
+
+def request_batch_run(
+    db: Session, projects: list[Project], lane: str | None = None, mode: str = "full"
+) -> str | None:
+    """Queue ``projects`` as one batch run (see ``services.batch``) and start it if a slot is free.
+
+    The batch runs as a single task on one worker, so it takes one of its
+    owner's run slots however many projects it holds. Returns the Celery task
+    id when the batch was dispatched immediately.
+    """
+    batch_id = str(uuid4())
+    now = datetime.utcnow()
+    priority = max(LANES[choose_lane(project, lane)] for project in projects)
+    for project in projects:
+        project.status = PENDING
+        project.run_mode = mode
+        project.priority = priority
+        project.batch_id = batch_id
+        project.run_requested_at = now
+        project.started_at = None
+        project.finished_at = None
+    db.commit()
+    task_ids = dispatch_pending(db, projects[0].user_id)
+    return task_ids.get(projects[0].id)
+
+
+def renew_lease(db: Session, project_id: int):
+    """Mark a running run as alive (committed by the caller); cheap enough to call for every paper."""
+    now = datetime.utcnow()
+    db.query(Project).filter(
+        Project.id == project_id,
+        Project.status == "running",
+        Project.updated_at < now - timedelta(seconds=LEASE_RENEW_SECONDS),
+    ).update({Project.updated_at: now}, synchronize_session=False)
+
+
+def reap_stale_runs(db: Session, user_id: int) -> list[int]:
+    """Fail the user's runs that were lost; returns their ids.
+
+    A running run renews its lease (``updated_at``) on every stage and paper;
+    one that has not for a whole broker visibility timeout lost its worker. A
+    scheduled run renews nothing while its message waits behind other work,
+    so only one still waiting ``scheduled_run_timeout`` after its dispatch
+    (the last change of ``updated_at``) is taken as lost with its message.
+    Either would otherwise hold a run slot forever.
+    """
+    settings = get_settings()
+    now = datetime.utcnow()
+    expired = or_(
+        and_(
+            Project.status == "running",
+            Project.updated_at < now - timedelta(seconds=settings.celery_visibility_timeout),
+        ),
+        and_(
+            Project.status == SCHEDULED,
+            Project.updated_at < now - timedelta(seconds=settings.scheduled_run_timeout),
+        ),
+    )
+    reaped = []
+    for (project_id,) in db.query(Project.id).filter(Project.user_id == user_id, expired).all():
+        # Re-checked in the UPDATE so a run that just finished or renewed is left alone.
+        values = {Project.status: "failed", Project.finished_at: now}
+        if db.query(Project).filter(Project.id == project_id, expired).update(values, synchronize_session=False):
+            reaped.append(project_id)
+    db.commit()
+    for project_id in reaped:
+        event_publisher.publish(project_id, "failed", {"error": "run lost by the broker or its worker"})
+    return reaped
+
+
+def _free_slots(db: Session, user_id: int) -> int:
+    """Run slots the user has left; takes the user's row lock until the caller commits."""
+    reap_stale_runs(db, user_id)
+    # Row lock on the user serializes admission between API processes and workers.
+    db.query(User).filter(User.id == user_id).with_for_update().one()
+    active = (
+        db.query(_RUN_UNITS)
+        .filter(Project.user_id == user_id, Project.status.in_(ACTIVE_STATUSES))
+        .scalar()
+    )
+    return get_settings().max_concurrent_runs_per_user - active
+
+
+def dispatch_pending(db: Session, user_id: int) -> dict[int, str]:
+    """Hand the user's oldest pending runs to Celery, up to their concurrency cap.
+
+    Returns the Celery task id of every dispatched project; the projects of a
+    batch share one task.
+    """
+    from workers.celery_app import run_batch_task, run_pipeline_task
+
+    free_slots = _free_slots(db, user_id)
+    if free_slots <= 0:
+        db.commit()
+        return {}
+    pending = (
+        db.query(Project)
+        .filter(Project.user_id == user_id, Project.status == PENDING)
+        .order_by(Project.priority, Project.run_requested_at, Project.id)
+        .all()
+    )
+    runs: dict[str, list[Project]] = {}
+    for project in pending:
+        key = project.batch_id or f"project:{project.id}"
+        if key in runs or len(runs) < free_slots:
+            runs.setdefault(key, []).append(project)
+    ready = list(runs.values())
+    for members in ready:
+        for project in members:
+            project.status = SCHEDULED
+    db.commit()
+    # Dispatch only after committing so the worker sees the scheduled rows.
+    task_ids = {}
+    for index, members in enumerate(ready):
+        first = members[0]
+        try:
+            if first.batch_id:
+                task_id = run_batch_task.apply_async(([project.id for project in members],), priority=first.priority).id
+            else:
+                task_id = run_pipeline_task.apply_async((first.id,), priority=first.priority).id
+        except Exception:
+            # The broker never got these runs: back to the queue, freeing their slots.
+            for unsent in ready[index:]:
+                for project in unsent:
+                    project.status = PENDING
+            db.commit()
+            raise
+        task_ids.update(dict.fromkeys([project.id for project in members], task_id))
+    return task_ids
+
+
+def _other_runs(project: Project):
+    if project.batch_id is None:
+        return Project.id != project.id
+    return and_(Project.id != project.id, or_(Project.batch_id.is_(None), Project.batch_id != project.batch_id))
+
+
+def _ahead_of(project: Project):
+    return or_(
+        Project.priority < project.priority,
+        and_(Project.priority == project.priority, Project.run_requested_at < project.run_requested_at),
+    )
+
+
+def average_run_seconds(db: Session, sample: int = 50) -> float:
+    recent = (
+        db.query(Project.started_at, Project.finished_at)
+        .filter(Project.status == "completed", Project.started_at.isnot(None), Project.finished_at.isnot(None))
+        .order_by(Project.finished_at.desc())
+        .limit(sample)
+        .all()
+    )
+    durations = [(finished - started).total_seconds() for started, finished in recent]
+    return sum(durations) / len(durations) if durations else get_settings().default_run_seconds
+
+
+def queue_status(db: Session, project: Project) -> dict:
+    """Queue position (runs ahead of this one) and a rough ETA until it starts."""
+    settings = get_settings()
+    info = {"lane": lane_name(project.priority), "queue_position": None, "eta_seconds": None}
+    if project.status not in (PENDING, SCHEDULED) or project.run_requested_at is None:
+        return info
+    position = (
+        db.query(_RUN_UNITS)
+        .filter(Project.status == SCHEDULED, _other_runs(project), _ahead_of(project))
+        .scalar()
+    )
+    if project.status == PENDING:
+        # A pending run also waits for the owner's running runs, their scheduled
+        # runs not already counted above and their earlier pending runs.
+        position += (
+            db.query(_RUN_UNITS)
+            .filter(
+                Project.user_id == project.user_id,
+                _other_runs(project),
+                or_(
+                    Project.status == "running",
+                    and_(Project.status == SCHEDULED, not_(_ahead_of(project))),
+                    and_(Project.status == PENDING, _ahead_of(project)),
+                ),
+            )
+            .scalar()
+        )
+    waves = math.floor(position / max(1, settings.worker_run_slots))
+    info["queue_position"] = position
+    info["eta_seconds"] = round(waves * average_run_seconds(db), 1)
+    return info
@@ -1,12 +1,26 @@
-from celery import Celery
+from __future__ import annotations
+
+import os
+from typing import TYPE_CHECKING
+
+from celery import Celery, chain, chord
+from celery.signals import worker_init, worker_process_init, worker_process_shutdown
+from prometheus_client import start_http_server
 from sqlalchemy.orm import Session
 
 from core.config import get_settings
 from db.session import SessionLocal
-from models import Project
-from services.pipeline import PipelineService
+from infrastructure.metrics import build_registry, mark_process_dead
+from models import Paper, Project
+from services.scheduler import ACTIVE_STATUSES, PRIORITY_STEPS, dispatch_pending, renew_lease
 from utils.files import ensure_storage_dirs
 
+# The pipeline and its providers are imported on first use, so processes that
+# only enqueue tasks (the API) or inspect the broker start quickly. Worker
+# parents import them once in ``worker_init``, before forking the pool.
+if TYPE_CHECKING:
+    from services.pipeline import PipelineService
+
 settings = get_settings()
 broker_url = settings.redis_url if not settings.task_always_eager else "memory://"
 backend_url = settings.redis_url if not settings.task_always_eager else "cache+memory://"
@@ -17,18 +31,233 @@ celery_app = Celery(
 )
 celery_app.conf.task_always_eager = settings.task_always_eager
 celery_app.conf.task_store_eager_result = settings.task_always_eager
+# Pipeline tasks are long: fetch one message at a time and acknowledge it only
+# once it has finished, so an idle worker is never starved by a busy one's prefetch.
+celery_app.conf.worker_prefetch_multiplier = 1
+celery_app.conf.task_acks_late = True
+celery_app.conf.task_reject_on_worker_lost = True
+celery_app.conf.broker_transport_options = {
+    "priority_steps": PRIORITY_STEPS,
+    "sep": ":",
+    "queue_order_strategy": "priority",
+    "visibility_timeout": settings.celery_visibility_timeout,
+}
+# Network-bound stages (arXiv, PDF downloads, LLM calls) and CPU-bound stages
+# (parsing, chunking, embedding) are consumed by separately sized worker pools.
+celery_app.conf.task_routes = {
+    "pipeline.run": {"queue": settings.pipeline_io_queue},
+    "pipeline.download_paper": {"queue": settings.pipeline_io_queue},
+    "pipeline.index_paper": {"queue": settings.pipeline_cpu_queue},
+    "pipeline.extract_paper": {"queue": settings.pipeline_io_queue},
+    "pipeline.finalize": {"queue": settings.pipeline_io_queue},
+    "pipeline.run_batch": {"queue": settings.pipeline_io_queue},
+    "blobs.collect_garbage": {"queue": settings.pipeline_io_queue},
+}
+celery_app.conf.beat_schedule = {
+    "collect-blob-garbage": {"task": "blobs.collect_garbage", "schedule": settings.blob_gc_interval_seconds},
+}
+
+
+@worker_init.connect
+def _start_metrics_server(**_kwargs):
+    # Served by the parent process; with PROMETHEUS_MULTIPROC_DIR it aggregates
+    # the samples every pool child writes.
+    if settings.worker_metrics_port:
+        start_http_server(settings.worker_metrics_port, registry=build_registry())
+
+
+@worker_init.connect
+def _preload_pipeline(**_kwargs):
+    # Pool children forked afterwards inherit these modules instead of importing them each.
+    import infrastructure.registry  # noqa: F401
+    import services.pipeline  # noqa: F401
+
+
+@worker_process_init.connect
+def _init_worker_process(**_kwargs):
+    # Providers are built after the fork so every child owns its HTTP pools and
+    # models, and they are ready before the first task arrives.
+    from infrastructure.registry import provider_registry
+
+    provider_registry.reset()
+    provider_registry.warm_up()
+
+
+@worker_process_shutdown.connect
+def _shutdown_worker_process(**_kwargs):
+    from infrastructure.registry import provider_registry
+
+    provider_registry.close()
+    mark_process_dead(os.getpid())
+
+
+def _pipeline_service(db: Session, project: Project) -> PipelineService:
+    from infrastructure.registry import provider_registry
+    from services.pipeline import PipelineService
+
+    return PipelineService(db, **provider_registry.for_project(project.config))
 
 
 @celery_app.task(name="pipeline.run")
 def run_pipeline_task(project_id: int):
+    """Search and select papers, then fan the per-paper stages out as a chord."""
     ensure_storage_dirs()
     db: Session = SessionLocal()
     try:
         project = db.query(Project).filter(Project.id == project_id).first()
         if not project:
             return "project not found"
-        service = PipelineService(db)
-        service.run(project)
+        if project.status not in ACTIVE_STATUSES:
+            # Reaped while its message waited in the broker.
+            return "not scheduled"
+        priority = project.priority
+        service = _pipeline_service(db, project)
+        if (project.config or {}).get("runtime", {}).get("profile"):
+            return _run_profiled(db, service, project)
+        try:
+            paper_ids = service.prepare(project)
+        except Exception as exc:  # noqa: BLE001
+            _fail_and_release(db, service, project, exc)
+            raise
+        # The paper tasks move the stage on from here as they finish.
+        service.update_stage(project, "DOWNLOAD", 40)
+        db.commit()
     finally:
         db.close()
+
+    callback = finalize_project_task.si(project_id).set(priority=priority)
+    if not paper_ids:
+        callback.delay()
+        return "ok"
+    chord(
+        [
+            chain(
+                download_paper_task.si(project_id, paper_id).set(priority=priority),
+                index_paper_task.si(project_id, paper_id).set(priority=priority),
+                extract_paper_task.si(project_id, paper_id).set(priority=priority),
+            )
+            for paper_id in paper_ids
+        ]
+    )(callback)
     return "ok"
+
+
+def _run_profiled(db: Session, service: PipelineService, project: Project) -> str:
+    """Run every stage in this process under the profiler and store the result as an export."""
+    from services.profiling import RunProfiler, save_profile_export
+
+    profiler = RunProfiler()
+    service.profiler = profiler
+    try:
+        with profiler.capture():
+            service.run(project)
+    except Exception as exc:  # noqa: BLE001
+        _fail_and_release(db, service, project, exc)
+        raise
+    finally:
+        save_profile_export(db, project, profiler.report())
+    dispatch_pending(db, project.user_id)
+    return "ok"
+
+
+def _fail_and_release(db: Session, service: PipelineService, project: Project, exc: Exception):
+    service.fail(project, str(exc))
+    dispatch_pending(db, project.user_id)
+
+
+def _run_paper_stage(project_id: int, paper_id: int, stage: str, method: str):
+    db: Session = SessionLocal()
+    try:
+        project = db.query(Project).filter(Project.id == project_id).first()
+        paper = db.query(Paper).filter(Paper.id == paper_id, Paper.project_id == project_id).first()
+        if not project or not paper or paper.failed_stage is not None:
+            return "skipped"
+        service = _pipeline_service(db, project)
+        # A failing paper is recorded and skipped so the chord still reaches WRITE/EXPORT.
+        try:
+            getattr(service, method)(project, paper)
+            result = "ok"
+        except Exception as exc:  # noqa: BLE001
+            service.mark_paper_failed(project, paper, stage, str(exc))
+            result = "failed"
+        service.report_paper_progress(project)
+        renew_lease(db, project_id)
+        db.commit()
+    finally:
+        db.close()
+    return result
+
+
+@celery_app.task(name="pipeline.download_paper")
+def download_paper_task(project_id: int, paper_id: int):
+    return _run_paper_stage(project_id, paper_id, "DOWNLOAD", "download_paper")
+
+
+@celery_app.task(name="pipeline.index_paper")
+def index_paper_task(project_id: int, paper_id: int):
+    return _run_paper_stage(project_id, paper_id, "EMBED", "index_paper")
+
+
+@celery_app.task(name="pipeline.extract_paper")
+def extract_paper_task(project_id: int, paper_id: int):
+    return _run_paper_stage(project_id, paper_id, "EXTRACT", "extract_paper")
+
+
+@celery_app.task(name="pipeline.finalize")
+def finalize_project_task(project_id: int):
+    ensure_storage_dirs()
+    db: Session = SessionLocal()
+    try:
+        project = db.query(Project).filter(Project.id == project_id).first()
+        if not project:
+            return "project not found"
+        service = _pipeline_service(db, project)
+        try:
+            service.finalize(project)
+        except Exception as exc:  # noqa: BLE001
+            _fail_and_release(db, service, project, exc)
+            raise
+        # The run's slot is free again: start the owner's next pending run.
+        dispatch_pending(db, project.user_id)
+    finally:
+        db.close()
+    return "ok"
+
+
+@celery_app.task(name="pipeline.run_batch")
+def run_batch_task(project_ids: list[int]):
+    """Run several projects in this process, sharing searches and per-paper work across them."""
+    from services.batch import BatchRunner
+
+    ensure_storage_dirs()
+    db: Session = SessionLocal()
+    try:
+        projects = (
+            db.query(Project)
+            .filter(Project.id.in_(project_ids), Project.status.in_(ACTIVE_STATUSES))
+            .order_by(Project.id)
+            .all()
+        )
+        if not projects:
+            return "projects not found"
+        runner = BatchRunner(db, lambda project: _pipeline_service(db, project), settings.embed_batch_size)
+        try:
+            runner.run(projects)
+        finally:
+            for user_id in {project.user_id for project in projects}:
+                dispatch_pending(db, user_id)
+    finally:
+        db.close()
+    return "ok"
+
+
+@celery_app.task(name="blobs.collect_garbage")
+def collect_blob_garbage_task():
+    """Delete the blobs whose last reference was released, e.g. PDFs and texts a re-run replaced."""
+    from services.blobs import collect_garbage
+
+    db: Session = SessionLocal()
+    try:
+        return collect_garbage(db)
+    finally:
+        db.close()
@@ -0,0 +1,165 @@
+"""Throughput of ``PipelineService.run`` over synthetic corpora.
+
+    python benchmarks/bench_pipeline.py --papers 100 1000 --llm-latency 0.02 --failure-rate 0.01
+
+Each size runs against a fresh SQLite database and blob directory. Results
+(end-to-end and per-stage) are written as JSON tagged with the current git
+commit; pass ``--baseline`` with an earlier file to print the change.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+_workdir = Path(tempfile.mkdtemp(prefix="bench-pipeline-"))
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_workdir / 'bench.db'}")
+os.environ.setdefault("STORAGE_ROOT", str(_workdir / "storage"))
+os.environ.setdefault("CHROMA_DIR", str(_workdir / "chroma"))
+os.environ.setdefault("REDIS_URL", "memory://")
+os.environ.setdefault("CELERY_TASK_ALWAYS_EAGER", "true")
+sys.path.insert(0, str(BACKEND_DIR / "app"))
+
+from db.base import Base  # noqa: E402
+from db.session import SessionLocal, engine  # noqa: E402
+from infrastructure.metrics import STAGE_SECONDS  # noqa: E402
+from infrastructure.pubsub import BufferedEventPublisher  # noqa: E402
+from models import Paper, Project, User  # noqa: E402
+from services.pipeline import STAGES, PipelineService  # noqa: E402
+from synthetic import (  # noqa: E402
+    Fault,
+    SlowEmbeddingProvider,
+    SlowLLMProvider,
+    SyntheticArxivAdapter,
+    SyntheticCorpus,
+)
+
+
+def _stage_totals() -> dict[str, tuple[float, float]]:
+    totals = {}
+    for metric in STAGE_SECONDS.collect():
+        for sample in metric.samples:
+            stage = sample.labels.get("stage")
+            if sample.name.endswith("_count"):
+                totals.setdefault(stage, [0.0, 0.0])[0] = sample.value
+            elif sample.name.endswith("_sum"):
+                totals.setdefault(stage, [0.0, 0.0])[1] = sample.value
+    return {stage: tuple(values) for stage, values in totals.items()}
+
+
+def run_once(size: int, args) -> dict:
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    corpus = SyntheticCorpus(size, seed=args.seed, pdf_kb=args.pdf_kb)
+    fault = {"jitter": args.jitter, "failure_rate": args.failure_rate}
+    service_kwargs = {
+        "arxiv_adapter": SyntheticArxivAdapter(
+            corpus, Fault(args.search_latency, args.jitter), Fault(args.pdf_latency, **fault)
+        ),
+        "llm_provider": SlowLLMProvider(Fault(args.llm_latency, **fault), seed=args.seed),
+        "embed_provider": SlowEmbeddingProvider(
+            Fault(args.embed_latency, **fault), seed=args.seed, dim=args.embed_dim
+        ),
+        "publisher": BufferedEventPublisher(None),
+    }
+    db = SessionLocal()
+    try:
+        user = User(email=f"bench-{size}@example.com", password_hash="x")
+        db.add(user)
+        db.commit()
+        project = Project(user_id=user.id, topic="synthetic benchmark", config={"search": {"max_results": size}})
+        db.add(project)
+        db.commit()
+
+        before = _stage_totals()
+        started = time.perf_counter()
+        PipelineService(db, **service_kwargs).run(project)
+        elapsed = time.perf_counter() - started
+        after = _stage_totals()
+        failed = db.query(Paper).filter(Paper.project_id == project.id, Paper.failed_stage.isnot(None)).count()
+    finally:
+        db.close()
+
+    stages = {}
+    for stage in STAGES:
+        count, total = after.get(stage, (0.0, 0.0))
+        count -= before.get(stage, (0.0, 0.0))[0]
+        total -= before.get(stage, (0.0, 0.0))[1]
+        if count:
+            stages[stage] = {
+                "calls": int(count),
+                "seconds": round(total, 4),
+                "mean_ms": round(total / count * 1000, 3),
+                "per_second": round(count / total, 2) if total else None,
+            }
+    return {
+        "papers": size,
+        "failed_papers": failed,
+        "seconds": round(elapsed, 4),
+        "papers_per_second": round(size / elapsed, 2),
+        "stages": stages,
+    }
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _print_comparison(results: dict, baseline_path: Path):
+    baseline = {run["papers"]: run for run in json.loads(baseline_path.read_text())["runs"]}
+    print(f"vs {baseline_path.name}:")
+    for run in results["runs"]:
+        old = baseline.get(run["papers"])
+        if old:
+            change = (run["papers_per_second"] - old["papers_per_second"]) / old["papers_per_second"] * 100
+            print(f"  {run['papers']:>6} papers: {run['papers_per_second']:>9.2f} papers/s ({change:+.1f}%)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--papers", type=int, nargs="+", default=[100, 1000], help="corpus sizes (up to 10000)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--pdf-kb", type=int, default=32, help="size of each fake PDF")
+    parser.add_argument("--search-latency", type=float, default=0.0, help="seconds per arXiv search")
+    parser.add_argument("--pdf-latency", type=float, default=0.0, help="seconds per PDF download")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="seconds per LLM call")
+    parser.add_argument("--embed-latency", type=float, default=0.0, help="seconds per embedding call")
+    parser.add_argument("--embed-dim", type=int, default=4, help="dimension of the mock embeddings")
+    parser.add_argument("--jitter", type=float, default=0.0, help="uniform +/- seconds added to every latency")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="probability a per-paper call fails")
+    parser.add_argument("--output", type=Path, help="JSON file (default: benchmarks/results/pipeline-<commit>.json)")
+    parser.add_argument("--baseline", type=Path, help="earlier results file to compare against")
+    args = parser.parse_args(argv)
+
+    runs = []
+    for size in args.papers:
+        run = run_once(size, args)
+        print(f"{size:>6} papers: {run['seconds']:>8.2f}s  {run['papers_per_second']:>9.2f} papers/s")
+        runs.append(run)
+
+    commit = _git_commit()
+    results = {
+        "benchmark": "pipeline",
+        "commit": commit,
+        "timestamp": datetime.utcnow().isoformat() + "Z",
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "baseline")},
+        "runs": runs,
+    }
+    output = args.output or BACKEND_DIR / "benchmarks" / "results" / f"pipeline-{commit or 'local'}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2))
+    print(f"wrote {output}")
+    if args.baseline:
+        _print_comparison(results, args.baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""Bytes and CPU time per response of the paper listing, per serializer and encoding.
+
+    python benchmarks/bench_serialization.py --papers 1000 10000
+
+Compares FastAPI's default path (ORM objects validated into ``PaperOut`` and
+encoded with the standard json module) with the row-tuple + orjson path used
+by ``GET /projects/{id}/papers``, then the size and CPU cost of compressing
+the body with gzip and brotli at the configured levels.
+"""
+import argparse
+import asyncio
+import gzip
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+_workdir = Path(tempfile.mkdtemp(prefix="bench-serialization-"))
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_workdir / 'bench.db'}")
+os.environ.setdefault("STORAGE_ROOT", str(_workdir / "storage"))
+os.environ.setdefault("CHROMA_DIR", str(_workdir / "chroma"))
+os.environ.setdefault("REDIS_URL", "memory://")
+sys.path.insert(0, str(BACKEND_DIR / "app"))
+
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+from fastapi.utils import create_response_field  # noqa: E402
+
+from api.compression import brotli  # noqa: E402
+from api.responses import rows_response, schema_columns  # noqa: E402
+from core.config import get_settings  # noqa: E402
+from db.base import Base  # noqa: E402
+from db.session import SessionLocal, engine  # noqa: E402
+from models import Paper, Project, User  # noqa: E402
+from schemas import PaperOut  # noqa: E402
+from synthetic import SyntheticCorpus  # noqa: E402
+
+_FIELD = create_response_field(name="response", type_=list[PaperOut])
+
+
+def _seed(size: int, seed: int) -> int:
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        user = User(email=f"bench-{size}@example.com", password_hash="x")
+        db.add(user)
+        db.commit()
+        project = Project(user_id=user.id, topic="serialization benchmark", config={})
+        db.add(project)
+        db.commit()
+        db.bulk_insert_mappings(
+            Paper,
+            [
+                {**vars(meta), "project_id": project.id, "download_status": "ok"}
+                for meta in SyntheticCorpus(size, seed=seed).papers
+            ],
+        )
+        db.commit()
+        return project.id
+    finally:
+        db.close()
+
+
+def _pydantic_body(project_id: int) -> bytes:
+    db = SessionLocal()
+    try:
+        papers = db.query(Paper).filter(Paper.project_id == project_id).order_by(Paper.id).all()
+        content = asyncio.run(serialize_response(field=_FIELD, response_content=papers))
+        return JSONResponse(content).body
+    finally:
+        db.close()
+
+
+def _rows_body(project_id: int) -> bytes:
+    db = SessionLocal()
+    try:
+        rows = (
+            db.query(*schema_columns(PaperOut, Paper))
+            .filter(Paper.project_id == project_id)
+            .order_by(Paper.id)
+            .all()
+        )
+        return rows_response(rows, PaperOut).body
+    finally:
+        db.close()
+
+
+def _measure(fn, repeat: int) -> tuple[float, object]:
+    """Lowest CPU seconds of ``repeat`` calls, and the last result."""
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        started = time.process_time()
+        result = fn()
+        best = min(best, time.process_time() - started)
+    return best, result
+
+
+def run_once(size: int, args) -> dict:
+    project_id = _seed(size, args.seed)
+    settings = get_settings()
+    serializers = {}
+    bodies = {}
+    for name, build in (("pydantic_json", _pydantic_body), ("rows_orjson", _rows_body)):
+        seconds, body = _measure(lambda: build(project_id), args.repeat)
+        serializers[name] = {"cpu_ms": round(seconds * 1000, 2), "bytes": len(body)}
+        bodies[name] = body
+    assert json.loads(bodies["pydantic_json"]) == json.loads(bodies["rows_orjson"]), "serializers disagree"
+
+    body = bodies["rows_orjson"]
+    encodings = {"identity": {"cpu_ms": 0.0, "bytes": len(body)}}
+    compressors = {"gzip": lambda: gzip.compress(body, compresslevel=settings.gzip_level)}
+    if brotli is not None:
+        compressors["br"] = lambda: brotli.compress(body, quality=settings.brotli_quality)
+    for name, compress in compressors.items():
+        seconds, compressed = _measure(compress, args.repeat)
+        encodings[name] = {"cpu_ms": round(seconds * 1000, 2), "bytes": len(compressed)}
+    return {"papers": size, "serializers": serializers, "encodings": encodings}
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--papers", type=int, nargs="+", default=[1000, 10000], help="papers in the listing")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5, help="runs per measurement; the fastest is kept")
+    parser.add_argument("--output", type=Path, help="JSON file (default: benchmarks/results/serialization-<commit>.json)")
+    args = parser.parse_args(argv)
+
+    runs = []
+    for size in args.papers:
+        run = run_once(size, args)
+        print(f"{size:>6} papers:")
+        for group in ("serializers", "encodings"):
+            for name, result in run[group].items():
+                print(f"    {name:<14} {result['bytes']:>12,} bytes  {result['cpu_ms']:>9.2f} ms cpu")
+        runs.append(run)
+
+    commit = _git_commit()
+    results = {
+        "benchmark": "serialization",
+        "commit": commit,
+        "timestamp": datetime.utcnow().isoformat() + "Z",
+        "config": {key: value for key, value in vars(args).items() if key != "output"},
+        "runs": runs,
+    }
+    output = args.output or BACKEND_DIR / "benchmarks" / "results" / f"serialization-{commit or 'local'}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2))
+    print(f"wrote {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+"""Load test of the REST API and WebSocket fan-out against a local app instance.
+
+    python benchmarks/loadtest.py --users 50 --subscribers 300 --events 20
+
+Starts ``main.app`` under uvicorn on a loopback port, then drives it with
+concurrent virtual users (register, login, create a project, poll its status,
+list its papers) and WebSocket subscribers on ``/api/v1/ws/projects/{id}``.
+Redis is replaced by an in-process hub and a fake publisher that stamps every
+event with its send time, so delivery lag is measured end to end. Reports
+p50/p95/p99 latency per request type, request throughput and event lag.
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from uuid import uuid4
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+_workdir = Path(tempfile.mkdtemp(prefix="loadtest-"))
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_workdir / 'loadtest.db'}")
+os.environ.setdefault("STORAGE_ROOT", str(_workdir / "storage"))
+os.environ.setdefault("CHROMA_DIR", str(_workdir / "chroma"))
+os.environ.setdefault("REDIS_URL", "memory://")
+os.environ.setdefault("CELERY_TASK_ALWAYS_EAGER", "true")
+sys.path.insert(0, str(BACKEND_DIR / "app"))
+
+import httpx  # noqa: E402
+import uvicorn  # noqa: E402
+import websockets  # noqa: E402
+
+import api.ws  # noqa: E402
+from db.base import Base  # noqa: E402
+from db.session import engine  # noqa: E402
+from infrastructure.fanout import ProjectEventHub  # noqa: E402
+from infrastructure.pubsub import project_channel  # noqa: E402
+from main import app  # noqa: E402
+
+API = "/api/v1"
+
+
+class LocalEventHub(ProjectEventHub):
+    """The real fan-out without Redis: events are dispatched straight into the server loop."""
+
+    def __init__(self, max_queue: int):
+        super().__init__("local://", max_queue)
+        self.loop: asyncio.AbstractEventLoop | None = None
+
+    async def _ensure_started(self):
+        self.loop = asyncio.get_running_loop()
+
+    async def history(self, project_id, after_id, batch_size=500):
+        return []
+
+
+class FakeEventPublisher:
+    def __init__(self, hub: LocalEventHub):
+        self.hub = hub
+
+    def publish(self, project_id: int, seq: int):
+        # "paper" events are never coalesced, so every one of them must arrive.
+        data = json.dumps({"type": "paper", "payload": {"seq": seq, "sent_at": time.perf_counter()}})
+        self.hub.loop.call_soon_threadsafe(self.hub.dispatch, project_channel(project_id), data)
+
+
+def percentiles(samples: list[float]) -> dict:
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+
+    def rank(p):
+        return ordered[min(len(ordered) - 1, max(0, round(p / 100 * len(ordered)) - 1))]
+
+    return {
+        "count": len(ordered),
+        "p50_ms": round(rank(50) * 1000, 2),
+        "p95_ms": round(rank(95) * 1000, 2),
+        "p99_ms": round(rank(99) * 1000, 2),
+        "max_ms": round(ordered[-1] * 1000, 2),
+    }
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+
+    async def request(self, client: httpx.AsyncClient, name: str, method: str, url: str, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            self.errors[name] += 1
+            return None
+        self.latencies[name].append(time.perf_counter() - started)
+        if response.status_code >= 400:
+            self.errors[name] += 1
+            return None
+        return response
+
+
+async def virtual_user(client: httpx.AsyncClient, recorder: Recorder, polls: int) -> tuple[int, str] | None:
+    email = f"load-{uuid4()}@example.com"
+    credentials = {"email": email, "password": "password123"}
+    if not await recorder.request(client, "register", "POST", f"{API}/auth/register", json=credentials):
+        return None
+    login = await recorder.request(
+        client, "login", "POST", f"{API}/auth/token", data={"username": email, "password": "password123"}
+    )
+    if not login:
+        return None
+    token = login.json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    created = await recorder.request(
+        client, "create_project", "POST", f"{API}/projects", json={"topic": "load test"}, headers=headers
+    )
+    if not created:
+        return None
+    project_id = created.json()["id"]
+    for _ in range(polls):
+        await recorder.request(client, "status", "GET", f"{API}/projects/{project_id}/status", headers=headers)
+    await recorder.request(client, "papers", "GET", f"{API}/projects/{project_id}/papers", headers=headers)
+    return project_id, token
+
+
+async def subscriber(url: str, expected: int, lags: list[float], connected: asyncio.Semaphore):
+    async with websockets.connect(url, max_queue=None) as ws:
+        connected.release()
+        received = 0
+        while received < expected:
+            try:
+                message = await asyncio.wait_for(ws.recv(), timeout=10)
+            except asyncio.TimeoutError:
+                return
+            payload = json.loads(message).get("payload", {})
+            if "sent_at" in payload:
+                lags.append(time.perf_counter() - payload["sent_at"])
+                received += 1
+
+
+async def drive(base_url: str, hub: LocalEventHub, args) -> dict:
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        started = time.perf_counter()
+        users = await asyncio.gather(*(virtual_user(client, recorder, args.polls) for _ in range(args.users)))
+        http_seconds = time.perf_counter() - started
+    users = [user for user in users if user]
+
+    lags: list[float] = []
+    delivered_expected = 0
+    if users and args.subscribers:
+        connected = asyncio.Semaphore(0)
+        ws_base = base_url.replace("http://", "ws://")
+        tasks = []
+        for index in range(args.subscribers):
+            project_id, token = users[index % len(users)]
+            url = f"{ws_base}{API}/ws/projects/{project_id}?token={token}"
+            tasks.append(asyncio.create_task(subscriber(url, args.events, lags, connected)))
+        for _ in range(args.subscribers):
+            await asyncio.wait_for(connected.acquire(), timeout=60)
+        # Connected clients are registered with the hub once their handler has subscribed.
+        while hub.subscriber_count() < args.subscribers:
+            await asyncio.sleep(0.01)
+        publisher = FakeEventPublisher(hub)
+        subscribed_projects = {users[index % len(users)][0] for index in range(args.subscribers)}
+        for seq in range(args.events):
+            for project_id in subscribed_projects:
+                publisher.publish(project_id, seq)
+            await asyncio.sleep(args.event_interval)
+        await asyncio.gather(*tasks, return_exceptions=True)
+        delivered_expected = args.subscribers * args.events
+
+    total_requests = sum(len(samples) for samples in recorder.latencies.values())
+    return {
+        "config": {key: value for key, value in vars(args).items() if key != "output"},
+        "http": {
+            "requests": total_requests,
+            "errors": dict(recorder.errors),
+            "seconds": round(http_seconds, 3),
+            "requests_per_second": round(total_requests / http_seconds, 1) if http_seconds else None,
+            "latency": {name: percentiles(samples) for name, samples in recorder.latencies.items()},
+        },
+        "websocket": {
+            "subscribers": args.subscribers,
+            "events_expected": delivered_expected,
+            "events_delivered": len(lags),
+            "lag": percentiles(lags),
+        },
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=50, help="concurrent virtual users")
+    parser.add_argument("--polls", type=int, default=10, help="status polls per user")
+    parser.add_argument("--concurrency", type=int, default=100, help="max open HTTP connections")
+    parser.add_argument("--subscribers", type=int, default=200, help="WebSocket clients")
+    parser.add_argument("--events", type=int, default=20, help="events published per subscribed project")
+    parser.add_argument("--event-interval", type=float, default=0.05, help="seconds between event rounds")
+    parser.add_argument("--ws-queue", type=int, default=1000, help="per-subscriber queue size in the hub")
+    parser.add_argument("--output", type=Path, help="also write the report as JSON")
+    args = parser.parse_args(argv)
+
+    Base.metadata.create_all(bind=engine)
+    hub = LocalEventHub(args.ws_queue)
+    api.ws.event_hub = hub
+
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", lifespan="on"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    try:
+        report = asyncio.run(drive(f"http://127.0.0.1:{port}", hub, args))
+    finally:
+        server.should_exit = True
+        thread.join(timeout=10)
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
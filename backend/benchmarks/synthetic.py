@@ -0,0 +1,124 @@
+"""Synthetic arXiv corpora and mock providers with injected latency and failures."""
+import random
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import List
+
+from infrastructure.arxiv import MockArxivAdapter, PaperMetadata
+from infrastructure.embedding import MockEmbeddingProvider
+from infrastructure.llm import MockLLMProvider
+from models import Paper
+
+_WORDS = (
+    "language model transformer attention retrieval graph neural network diffusion benchmark dataset "
+    "reinforcement learning policy reward alignment evaluation robustness adversarial contrastive "
+    "representation pretraining finetuning instruction reasoning chain sparse mixture expert token "
+    "embedding quantization distillation inference latency memory scaling law multimodal vision speech"
+).split()
+_CATEGORIES = ["cs.AI", "cs.CL", "cs.LG", "cs.CV", "cs.IR", "stat.ML"]
+
+
+class InjectedFailure(RuntimeError):
+    pass
+
+
+@dataclass
+class Fault:
+    """Per-call latency (seconds), uniform +/- jitter and failure probability."""
+
+    latency: float = 0.0
+    jitter: float = 0.0
+    failure_rate: float = 0.0
+
+    def apply(self, rng: random.Random, lock: threading.Lock, what: str, can_fail: bool = True):
+        with lock:
+            delay = max(0.0, self.latency + rng.uniform(-self.jitter, self.jitter))
+            fail = can_fail and rng.random() < self.failure_rate
+        if delay:
+            time.sleep(delay)
+        if fail:
+            raise InjectedFailure(f"injected {what} failure")
+
+
+class SyntheticCorpus:
+    """``size`` deterministic papers; PDFs are generated on demand, never held in memory."""
+
+    def __init__(self, size: int, seed: int = 0, abstract_words: int = 200, pdf_kb: int = 32):
+        self.seed = seed
+        self.pdf_kb = pdf_kb
+        rng = random.Random(seed)
+        base = datetime(2024, 1, 1)
+        self.papers = []
+        for index in range(size):
+            published = base + timedelta(minutes=index)
+            self.papers.append(
+                PaperMetadata(
+                    arxiv_id=f"2401.{index:05d}",
+                    title=" ".join(rng.choices(_WORDS, k=8)).capitalize(),
+                    authors=[f"Author {rng.randrange(size * 2)}" for _ in range(rng.randint(1, 6))],
+                    abstract=" ".join(rng.choices(_WORDS, k=rng.randint(abstract_words // 2, abstract_words * 2))),
+                    categories=rng.sample(_CATEGORIES, k=rng.randint(1, 3)),
+                    published_at=published,
+                    pdf_url=f"http://example.com/{index}.pdf",
+                    updated_at=published,
+                )
+            )
+
+    def __len__(self) -> int:
+        return len(self.papers)
+
+    def pdf(self, arxiv_id: str) -> bytes:
+        rng = random.Random(f"{self.seed}:{arxiv_id}")
+        body = " ".join(rng.choices(_WORDS, k=self.pdf_kb * 1024 // 8)).encode()
+        return b"%PDF-1.4\n" + body[: self.pdf_kb * 1024] + b"\n%%EOF\n"
+
+
+class SyntheticArxivAdapter(MockArxivAdapter):
+    def __init__(self, corpus: SyntheticCorpus, search_fault: Fault | None = None, pdf_fault: Fault | None = None):
+        self.corpus = corpus
+        self.search_fault = search_fault or Fault()
+        self.pdf_fault = pdf_fault or Fault()
+        self._rng = random.Random(corpus.seed + 1)
+        self._lock = threading.Lock()
+
+    def search(self, query, start, max_results, updated_since=None) -> List[PaperMetadata]:
+        # A failed search would fail the whole run, so only its latency is injected.
+        self.search_fault.apply(self._rng, self._lock, "search", can_fail=False)
+        results = self.corpus.papers
+        if updated_since is not None:
+            results = [meta for meta in results if meta.updated_at > updated_since]
+        return results[start:start + max_results]
+
+    def fetch_pdf(self, paper: Paper) -> bytes | None:
+        self.pdf_fault.apply(self._rng, self._lock, "pdf download")
+        return self.corpus.pdf(paper.arxiv_id)
+
+
+class SlowLLMProvider(MockLLMProvider):
+    def __init__(self, fault: Fault | None = None, seed: int = 0):
+        self.fault = fault or Fault()
+        self._rng = random.Random(seed + 2)
+        self._lock = threading.Lock()
+
+    def generate_structured(self, prompt: str, schema: dict) -> dict:
+        self.fault.apply(self._rng, self._lock, "llm")
+        return super().generate_structured(prompt, schema)
+
+    def write_markdown(self, outline: str, evidence: List[str]) -> str:
+        # WRITE is per project, not per paper: injected failures would abort the run.
+        self.fault.apply(self._rng, self._lock, "llm", can_fail=False)
+        return super().write_markdown(outline, evidence)
+
+
+class SlowEmbeddingProvider(MockEmbeddingProvider):
+    def __init__(self, fault: Fault | None = None, seed: int = 0, dim: int = 4):
+        super().__init__(dim)
+        self.fault = fault or Fault()
+        self._rng = random.Random(seed + 3)
+        self._lock = threading.Lock()
+
+    def embed_array(self, texts: List[str], normalize: bool = False):
+        self.fault.apply(self._rng, self._lock, "embedding")
+        return super().embed_array(texts, normalize)
@@ -1,5 +1,8 @@
+import json
 from uuid import uuid4
 
+from infrastructure.pubsub import event_publisher
+
 
 def test_register_login_create_and_run_pipeline(client):
     email = f"test-{uuid4()}@example.com"
@@ -41,8 +44,128 @@ def test_register_login_create_and_run_pipeline(client):
     assert papers_resp.status_code == 200
     papers = papers_resp.json()
     assert len(papers) > 0
+    assert all(paper["download_status"] == "ok" for paper in papers)
 
     exports_resp = client.get(f"/api/v1/projects/{project['id']}/exports", headers=headers)
     assert exports_resp.status_code == 200
     exports = exports_resp.json()
     assert any(e["format"] == "md" for e in exports)
+    md_export = next(e for e in exports if e["format"] == "md")
+    download_resp = client.get(
+        f"/api/v1/projects/{project['id']}/exports/{md_export['id']}/download", headers=headers
+    )
+    assert download_resp.status_code == 200
+    assert download_resp.text.startswith("# Large Language Models")
+
+    compare_resp = client.get(
+        f"/api/v1/projects/{project['id']}/compare", params={"metric": "acc"}, headers=headers
+    )
+    assert compare_resp.status_code == 200
+    [row] = compare_resp.json()
+    assert row["dataset"] == "mock-dataset"
+    assert row["papers"] == len(papers)
+    assert row["max"] == 0.9
+
+    search_resp = client.get(
+        "/api/v1/papers/search", params={"q": "mock", "category": "cs.AI", "limit": 1}, headers=headers
+    )
+    assert search_resp.status_code == 200
+    page = search_resp.json()
+    assert [hit["project_id"] for hit in page["items"]] == [project["id"]]
+    assert "cs.AI" in page["items"][0]["categories"]
+
+    delete_resp = client.delete(f"/api/v1/projects/{project['id']}", headers=headers)
+    assert delete_resp.status_code == 200
+
+
+def test_chat_stream_sends_sse_deltas(client):
+    email = f"chat-{uuid4()}@example.com"
+    client.post("/api/v1/auth/register", json={"email": email, "password": "password123"})
+    token = client.post(
+        "/api/v1/auth/token",
+        data={"username": email, "password": "password123", "grant_type": "password"},
+    ).json()["access_token"]
+
+    resp = client.post(
+        "/api/v1/chat/stream",
+        json={"messages": [{"role": "user", "content": "hello"}]},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/event-stream")
+    events = [line[len("data: "):] for line in resp.text.splitlines() if line.startswith("data: ")]
+    assert events[-1] == "[DONE]"
+    assert json.loads(events[0])["delta"]
+
+
+def test_metrics_exposes_stage_and_provider_series(client):
+    email = f"metrics-{uuid4()}@example.com"
+    client.post("/api/v1/auth/register", json={"email": email, "password": "password123"})
+    token = client.post(
+        "/api/v1/auth/token",
+        data={"username": email, "password": "password123", "grant_type": "password"},
+    ).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    project = client.post(
+        "/api/v1/projects", json={"topic": "Metrics", "search": {"max_results": 1}}, headers=headers
+    ).json()
+    assert client.post(f"/api/v1/projects/{project['id']}/run", headers=headers).status_code == 200
+
+    resp = client.get("/metrics")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain")
+    body = resp.text
+    assert 'pipeline_stage_duration_seconds_count{stage="EXTRACT"}' in body
+    assert 'provider_request_duration_seconds_count{operation="generate_structured",provider="llm:mock"}' in body
+    assert "pipeline_chunks_total" in body
+
+
+def test_profiled_run_stores_profile_export(client):
+    email = f"profile-{uuid4()}@example.com"
+    client.post("/api/v1/auth/register", json={"email": email, "password": "password123"})
+    token = client.post(
+        "/api/v1/auth/token",
+        data={"username": email, "password": "password123", "grant_type": "password"},
+    ).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    project = client.post(
+        "/api/v1/projects",
+        json={"topic": "Profiling", "search": {"max_results": 2}, "runtime": {"profile": True}},
+        headers=headers,
+    ).json()
+    assert client.post(f"/api/v1/projects/{project['id']}/run", headers=headers).status_code == 200
+
+    exports = client.get(f"/api/v1/projects/{project['id']}/exports", headers=headers).json()
+    profile_export = next(e for e in exports if e["format"] == "profile")
+    report = client.get(
+        f"/api/v1/projects/{project['id']}/exports/{profile_export['id']}/download", headers=headers
+    ).json()
+    assert [stage["stage"] for stage in report["stages"]][:2] == ["KEYWORD_EXPAND", "ARXIV_SEARCH"]
+    assert "prepare" in report["cprofile"]
+
+
+def test_fanned_out_run_reports_paper_stages(client, monkeypatch):
+    events = []
+    monkeypatch.setattr(event_publisher, "publish", lambda *event: events.append(event))
+    email = f"stages-{uuid4()}@example.com"
+    client.post("/api/v1/auth/register", json={"email": email, "password": "password123"})
+    token = client.post(
+        "/api/v1/auth/token",
+        data={"username": email, "password": "password123", "grant_type": "password"},
+    ).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    project = client.post(
+        "/api/v1/projects", json={"topic": "Stages", "search": {"max_results": 2}}, headers=headers
+    ).json()
+    assert client.post(f"/api/v1/projects/{project['id']}/run", headers=headers).status_code == 200
+
+    stages = [
+        (payload["stage"], payload["progress"])
+        for project_id, event_type, payload in events
+        if project_id == project["id"] and event_type == "stage"
+    ]
+    names = [stage for stage, _progress in stages]
+    per_paper = names[names.index("TOPK_SELECT") + 1:names.index("WRITE")]
+    assert per_paper[0] == "DOWNLOAD" and {"EMBED", "EXTRACT"} <= set(per_paper)
+    progress = [progress for _stage, progress in stages[names.index("TOPK_SELECT"):]]
+    assert progress == sorted(progress) and len(set(progress)) == len(progress)
@@ -0,0 +1,123 @@
+import threading
+from uuid import uuid4
+
+from db.session import SessionLocal
+from infrastructure.arxiv import MockArxivAdapter
+from infrastructure.embedding import MockEmbeddingProvider
+from infrastructure.llm import MockLLMProvider
+from models import Project, User
+from services.batch import BatchRunner, plan_searches
+from services.pipeline import PipelineService
+
+
+class CountingArxiv(MockArxivAdapter):
+    def __init__(self):
+        self.searches = []
+
+    def search(self, query, start, max_results, updated_since=None):
+        self.searches.append((query, start, max_results))
+        return super().search(query, start, max_results, updated_since)
+
+
+class CountingLLM(MockLLMProvider):
+    def __init__(self):
+        self.prompts = 0
+
+    def generate_structured(self, prompt, schema):
+        self.prompts += 1
+        return super().generate_structured(prompt, schema)
+
+
+class CountingEmbedding(MockEmbeddingProvider):
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    def embed_array(self, texts, normalize=False):
+        self.calls += 1
+        return super().embed_array(texts, normalize)
+
+
+class ConcurrentLLM(MockLLMProvider):
+    batch_concurrency = 3
+
+    def __init__(self):
+        self.barrier = threading.Barrier(3)
+
+    def generate_structured(self, prompt, schema):
+        self.barrier.wait(timeout=5)
+        self.record_usage(len(prompt))
+        self.barrier.wait(timeout=5)
+        if prompt == "fail":
+            raise RuntimeError("bad prompt")
+        return {"prompt": prompt}
+
+
+def test_llm_batch_reports_each_call_usage():
+    results = ConcurrentLLM().generate_structured_batch(["ab", "fail", "abcdef"], {}, return_exceptions=True)
+    assert [tokens for _result, tokens in results] == [2, 4, 6]
+    assert results[0][0] == {"prompt": "ab"} and isinstance(results[1][0], RuntimeError)
+
+
+def _project(db, user, topic, start, max_results):
+    project = Project(user_id=user.id, topic=topic, config={"search": {"start": start, "max_results": max_results}})
+    db.add(project)
+    return project
+
+
+def test_batch_run_shares_searches_and_papers_across_projects():
+    db = SessionLocal()
+    try:
+        user = User(email=f"batch-{uuid4()}@example.com", password_hash="x")
+        db.add(user)
+        db.commit()
+        projects = [
+            _project(db, user, "Graph networks", 0, 1),
+            _project(db, user, "graph   NETWORKS", 0, 2),
+            _project(db, user, "Graph networks", 1, 1),
+            _project(db, user, "Diffusion", 0, 2),
+        ]
+        db.commit()
+        plan = plan_searches(projects)
+        assert [(group.start, group.end, len(group.windows)) for group in plan] == [(0, 2, 3), (0, 2, 1)]
+
+        arxiv, llm, embed = CountingArxiv(), CountingLLM(), CountingEmbedding()
+        BatchRunner(db, lambda project: PipelineService(db, arxiv, llm, embed)).run(projects)
+
+        assert len(arxiv.searches) == 2
+        # Six project papers, but only the two mock arXiv papers are processed.
+        assert llm.prompts == 2 and embed.calls == 1
+        assert [len(project.papers) for project in projects] == [1, 2, 1, 2]
+        costs = 0
+        for project in projects:
+            db.refresh(project)
+            assert project.status == "completed"
+            for paper in project.papers:
+                assert paper.download_status == "ok" and paper.text_digest and len(paper.analyses) == 1
+                costs += paper.analyses[0].token_cost
+        assert projects[2].papers[0].arxiv_id == projects[1].papers[1].arxiv_id
+        assert 0 < costs <= llm.total_tokens
+    finally:
+        db.close()
+
+
+def test_run_batch_endpoint(client):
+    email = f"batch-{uuid4()}@example.com"
+    client.post("/api/v1/auth/register", json={"email": email, "password": "password123"})
+    token = client.post("/api/v1/auth/token", data={"username": email, "password": "password123"}).json()
+    headers = {"Authorization": f"Bearer {token['access_token']}"}
+    ids = [
+        client.post("/api/v1/projects", json={"topic": topic, "search": {"max_results": 2}}, headers=headers).json()["id"]
+        for topic in ("Agents", "agents", "Retrieval")
+    ]
+
+    # The whole batch takes one run slot, so it may hold more projects than the per-user cap (2 by default).
+    resp = client.post("/api/v1/projects/run-batch", json={"project_ids": ids}, headers=headers)
+    assert resp.status_code == 200
+    assert resp.json()["task_id"] is not None
+    assert [search["project_ids"] for search in resp.json()["searches"]] == [ids[:2], ids[2:]]
+    for project_id in ids:
+        assert client.get(f"/api/v1/projects/{project_id}", headers=headers).json()["status"] == "completed"
+
+    missing = client.post("/api/v1/projects/run-batch", json={"project_ids": [ids[0], 10**9]}, headers=headers)
+    assert missing.status_code == 404
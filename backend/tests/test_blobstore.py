@@ -0,0 +1,59 @@
+from uuid import uuid4
+
+from db.session import SessionLocal
+from infrastructure.blobstore import BlobStore
+from models import Blob
+from services.blobs import blob_store, collect_garbage, read_blob, release_blobs, store_blob
+from workers.celery_app import collect_blob_garbage_task
+
+
+def test_blob_store_dedups_and_shards(tmp_path):
+    store = BlobStore(str(tmp_path))
+    digest, compression = store.put(b"same bytes", compress=True)
+    assert store.put(b"same bytes", compress=True) == (digest, compression)
+    path = store.path(digest, compression)
+    assert path.parent.parent.name == digest[:2] and path.parent.name == digest[2:4]
+    assert store.read(digest, compression) == b"same bytes"
+    assert not [p for p in path.parent.iterdir() if p.name.startswith(".tmp-")]
+
+
+def test_refcounted_blobs_are_collected_when_unreferenced():
+    data = f"report {uuid4()}".encode()
+    db = SessionLocal()
+    try:
+        blob = store_blob(db, data, compress=True)
+        store_blob(db, data, compress=True)
+        db.commit()
+        digest = blob.digest
+        assert db.get(Blob, digest).refcount == 2
+        assert read_blob(db, digest) == data
+
+        release_blobs(db, [digest])
+        db.commit()
+        assert collect_garbage(db, [digest]) == 0
+
+        release_blobs(db, [digest])
+        db.commit()
+        assert collect_garbage(db, [digest]) == 1
+        assert db.get(Blob, digest) is None
+        assert not blob_store.path(digest, blob.compression).exists()
+    finally:
+        db.close()
+
+
+def test_periodic_sweep_collects_released_blobs():
+    data = f"superseded pdf {uuid4()}".encode()
+    db = SessionLocal()
+    try:
+        blob = store_blob(db, data)
+        db.commit()
+        digest, path = blob.digest, blob_store.path(blob.digest, blob.compression)
+        release_blobs(db, [digest])
+        db.commit()
+
+        assert collect_blob_garbage_task.apply().get() >= 1
+        db.expire_all()
+        assert db.get(Blob, digest) is None
+        assert not path.exists()
+    finally:
+        db.close()
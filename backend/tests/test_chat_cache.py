@@ -0,0 +1,40 @@
+from infrastructure.embedding import EmbeddingProvider
+from services.chat_cache import SemanticChatCache
+
+
+class KeywordEmbeddingProvider(EmbeddingProvider):
+    vocabulary = ["transformer", "diffusion", "dataset", "benchmark"]
+
+    def embed(self, texts):
+        return [[float(text.count(word)) + 0.01 for word in self.vocabulary] for text in texts]
+
+
+def _ask(content):
+    return [{"role": "user", "content": content}]
+
+
+def test_semantic_cache_hits_near_duplicates_within_scope():
+    cache = SemanticChatCache(KeywordEmbeddingProvider(), threshold=0.99, max_entries=4)
+    cache.store(_ask("Which transformer benchmark?"), "model-a", "GLUE")
+
+    hit = cache.lookup(_ask("  which TRANSFORMER   benchmark "), "model-a")
+    assert hit is not None and hit.reply == "GLUE"
+    assert cache.lookup(_ask("Which diffusion dataset?"), "model-a") is None
+    assert cache.lookup(_ask("Which transformer benchmark?"), "model-b") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 2
+
+
+def test_semantic_cache_evicts_least_recently_used_and_expired():
+    cache = SemanticChatCache(KeywordEmbeddingProvider(), threshold=0.99, max_entries=2)
+    cache.store(_ask("transformer"), "m", "t")
+    cache.store(_ask("diffusion"), "m", "d")
+    assert cache.lookup(_ask("transformer"), "m") is not None
+    cache.store(_ask("dataset"), "m", "ds")
+    assert cache.lookup(_ask("diffusion"), "m") is None
+    assert cache.lookup(_ask("transformer"), "m") is not None
+
+    expired = SemanticChatCache(KeywordEmbeddingProvider(), threshold=0.99, ttl_seconds=-1)
+    expired.store(_ask("benchmark"), "m", "b")
+    assert expired.lookup(_ask("benchmark"), "m") is None
+    assert expired.stats()["entries"] == 0
@@ -0,0 +1,24 @@
+from api.compression import accepted_encodings
+
+OPENAPI = "/api/v1/openapi.json"
+
+
+def test_large_responses_are_compressed_for_accepting_clients(client):
+    plain = client.get(OPENAPI, headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+
+    gzipped = client.get(OPENAPI, headers={"Accept-Encoding": "gzip"})
+    assert gzipped.headers["content-encoding"] == "gzip"
+    assert int(gzipped.headers["content-length"]) < len(plain.content)
+    assert gzipped.json() == plain.json()
+
+    brotli = client.get(OPENAPI, headers={"Accept-Encoding": "gzip, br"})
+    assert brotli.headers["content-encoding"] == "br"
+    assert brotli.json() == plain.json()
+
+    small = client.get("/api/v1/projects", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers
+
+
+def test_accept_encoding_honours_zero_quality():
+    assert accepted_encodings("gzip;q=1.0, br;q=0, *") == {"gzip", "*"}
@@ -0,0 +1,27 @@
+import numpy as np
+
+from infrastructure.embedding import EmbeddingProvider, MockEmbeddingProvider
+
+
+class ListEmbeddingProvider(EmbeddingProvider):
+    def embed(self, texts):
+        return [[3.0, 4.0] for _ in texts]
+
+
+def test_mock_embeddings_are_deterministic_float32_batches():
+    provider = MockEmbeddingProvider(dim=64)
+    batch = provider.embed_array(["alpha", "beta", "alpha"])
+    assert batch.dtype == np.float32 and batch.shape == (3, 64) and batch.flags.c_contiguous
+    assert np.array_equal(batch[0], batch[2]) and not np.array_equal(batch[0], batch[1])
+    assert np.array_equal(MockEmbeddingProvider(dim=64).embed_array(["beta"])[0], batch[1])
+
+    normalized = provider.embed_array(["alpha"], normalize=True)
+    assert np.isclose(np.linalg.norm(normalized[0]), 1.0)
+    assert provider.embed(["alpha"]) == batch[:1].tolist()
+    assert provider.embed_array([]).shape == (0, 64)
+
+
+def test_list_providers_get_the_array_api():
+    matrix = ListEmbeddingProvider().embed_array(["a", "b"], normalize=True)
+    assert matrix.dtype == np.float32
+    assert np.allclose(matrix, [[0.6, 0.8], [0.6, 0.8]])
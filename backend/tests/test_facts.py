@@ -0,0 +1,18 @@
+from services.facts import extract_facts, parse_number
+
+
+def test_extract_facts_attributes_metrics_to_datasets():
+    facts = extract_facts(
+        {
+            "datasets": [{"name": "ImageNet"}, {"name": "CIFAR-10"}],
+            "metrics": [
+                {"name": "top1", "value": "81.2%", "dataset": "ImageNet", "setting": "ViT-B"},
+                {"name": "params", "value": "86M"},
+            ],
+        }
+    )
+    assert facts[:2] == [{"dataset": "ImageNet"}, {"dataset": "CIFAR-10"}]
+    assert facts[2]["value_numeric"] == 81.2 and facts[2]["dataset"] == "ImageNet"
+    # Two datasets and no explicit one: the metric is not guessed onto either.
+    assert facts[3]["dataset"] is None
+    assert parse_number("n/a") is None
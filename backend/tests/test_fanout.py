@@ -0,0 +1,49 @@
+import asyncio
+import json
+
+import pytest
+
+from infrastructure.fanout import ProjectEvent, ProjectEventHub, Subscriber, parse_event_id
+
+
+def test_subscriber_coalesces_stage_events_and_drops_oldest():
+    subscriber = Subscriber(max_queue=2)
+    subscriber.push(ProjectEvent(type="stage", data="s1"))
+    subscriber.push(ProjectEvent(type="log", data="l1"))
+    subscriber.push(ProjectEvent(type="stage", data="s2"))
+    assert subscriber.dropped == 0
+    subscriber.push(ProjectEvent(type="log", data="l2"))
+    assert subscriber.dropped == 1
+
+    async def drain():
+        subscriber.close()
+        items = []
+        while (event := await subscriber.get()) is not None:
+            items.append(event.data)
+        return items
+
+    assert asyncio.run(drain()) == ["s2", "l2"]
+
+
+def test_hub_dispatches_to_project_subscribers_only():
+    async def scenario():
+        hub = ProjectEventHub("memory://", max_queue=10)
+        first = await hub.subscribe(1)
+        other = await hub.subscribe(2)
+        message = json.dumps({"type": "stage", "project_id": 1, "payload": {"stage": "PARSE"}})
+        hub.dispatch(b"ws:project:1", message.encode())
+        event = await asyncio.wait_for(first.get(), timeout=1)
+        hub.unsubscribe(2, other)
+        assert await other.get() is None
+        assert hub.subscriber_count() == 1
+        return event
+
+    event = asyncio.run(scenario())
+    assert json.loads(event.data)["payload"]["stage"] == "PARSE"
+
+
+def test_parse_event_id_orders_stream_ids():
+    assert parse_event_id("1700000000000-2") < parse_event_id("1700000000000-10")
+    assert parse_event_id("0") == (0, 0)
+    with pytest.raises(ValueError):
+        parse_event_id("latest")
@@ -0,0 +1,46 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+APP_DIR = Path(__file__).resolve().parents[1] / "app"
+
+# Cold-start ceilings in seconds (best of three fresh interpreters); scale them
+# with IMPORT_BUDGET_SCALE on slow machines. Modules listed as deferred must
+# only be imported on first use.
+BUDGETS = {
+    "main": (2.5, ["httpx", "numpy", "passlib", "jose", "celery", "services.chat_cache", "infrastructure.registry"]),
+    "workers.celery_app": (1.5, ["httpx", "numpy", "services.pipeline", "infrastructure.registry", "fastapi"]),
+}
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+print(json.dumps({{"seconds": time.perf_counter() - start, "modules": sorted(sys.modules)}}))
+"""
+
+
+def _cold_import(module: str) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", _PROBE.format(module=module)],
+        cwd=APP_DIR,
+        env={**os.environ, "PYTHONPATH": str(APP_DIR)},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+@pytest.mark.parametrize("module", sorted(BUDGETS))
+def test_cold_import_stays_within_budget(module):
+    budget, deferred = BUDGETS[module]
+    runs = [_cold_import(module) for _ in range(3)]
+    loaded = [name for name in deferred if name in runs[0]["modules"]]
+    assert not loaded, f"{module} imports {loaded} at start-up"
+    seconds = min(run["seconds"] for run in runs)
+    assert seconds <= budget * float(os.environ.get("IMPORT_BUDGET_SCALE", "1")), f"{module}: {seconds:.2f}s"
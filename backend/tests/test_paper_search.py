@@ -0,0 +1,57 @@
+from uuid import uuid4
+
+from db.session import SessionLocal
+from models import Paper, Project, User
+from services.paper_search import search_papers
+
+
+def test_cursor_pages_return_every_match_exactly_once():
+    db = SessionLocal()
+    try:
+        user = User(email=f"search-{uuid4()}@example.com", password_hash="x")
+        db.add(user)
+        db.commit()
+        project = Project(user_id=user.id, topic="paging", config={})
+        db.add(project)
+        db.commit()
+        # Repeated titles tie on rank; the rest rank by how often the term appears.
+        titles = ["graph"] * 4 + [" ".join(["graph"] * n + ["theory"]) for n in range(1, 8)] + ["unrelated"]
+        for index, title in enumerate(titles):
+            db.add(Paper(project_id=project.id, arxiv_id=f"paging-{index}", title=title, abstract=title))
+        db.commit()
+        expected = {paper.id for paper in project.papers if paper.title != "unrelated"}
+
+        seen, cursor = [], None
+        while True:
+            hits, cursor = search_papers(db, user.id, q="graph", limit=3, cursor=cursor)
+            seen.extend(paper.id for paper, _rank in hits)
+            ranks = [rank for _paper, rank in hits]
+            assert ranks == sorted(ranks, reverse=True)
+            if cursor is None:
+                break
+        assert sorted(seen) == sorted(expected)
+    finally:
+        db.close()
+
+
+def test_wildcards_in_the_query_match_literally():
+    db = SessionLocal()
+    try:
+        user = User(email=f"search-{uuid4()}@example.com", password_hash="x")
+        db.add(user)
+        db.commit()
+        project = Project(user_id=user.id, topic="wildcards", config={})
+        db.add(project)
+        db.commit()
+        titles = ["50% fewer parameters", "500 tokens per second", "snake_case tokenizers", "snakeXcase tokenizers"]
+        for index, title in enumerate(titles):
+            db.add(Paper(project_id=project.id, arxiv_id=f"wildcard-{index}", title=title, abstract=title))
+        db.commit()
+
+        def titles_for(q):
+            return sorted(paper.title for paper, _rank in search_papers(db, user.id, q=q)[0])
+
+        assert titles_for("50%") == ["50% fewer parameters"]
+        assert titles_for("snake_case") == ["snake_case tokenizers"]
+    finally:
+        db.close()
@@ -0,0 +1,92 @@
+import time
+from uuid import uuid4
+
+import fakeredis
+
+from db.session import SessionLocal
+from infrastructure.pubsub import BufferedEventPublisher, project_stream_key
+from models import Project, User
+from services.pipeline import PipelineService
+
+
+def _stream(client, project_id):
+    return [entry[b"event"] for _id, entry in client.xrange(project_stream_key(project_id))]
+
+
+def _wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_pending_stage_events_are_coalesced_per_project():
+    client = fakeredis.FakeRedis()
+    publisher = BufferedEventPublisher(client, flush_interval=60)
+    publisher.publish(1, "stage", {"stage": "DOWNLOAD"})
+    publisher.publish(1, "paper", {"paper_id": 7})
+    publisher.publish(2, "stage", {"stage": "DOWNLOAD"})
+    publisher.publish(1, "stage", {"stage": "EMBED"})
+    publisher.flush()
+
+    first = _stream(client, 1)
+    assert len(first) == 2
+    assert b'"paper_id": 7' in first[0] and b'"EMBED"' in first[1]
+    assert len(_stream(client, 2)) == 1
+
+
+def test_flusher_sends_a_full_batch_at_once():
+    client = fakeredis.FakeRedis()
+    publisher = BufferedEventPublisher(client, flush_interval=60, max_batch=3)
+    for paper_id in range(3):
+        publisher.publish(1, "paper", {"paper_id": paper_id})
+    _wait_for(lambda: len(_stream(client, 1)) == 3)
+
+
+def test_flusher_sends_a_partial_batch_after_the_interval():
+    client = fakeredis.FakeRedis()
+    publisher = BufferedEventPublisher(client, flush_interval=0.05, max_batch=100)
+    publisher.publish(1, "paper", {"paper_id": 1})
+    _wait_for(lambda: len(_stream(client, 1)) == 1)
+
+
+def test_forked_process_starts_its_own_flusher():
+    client = fakeredis.FakeRedis()
+    publisher = BufferedEventPublisher(client, flush_interval=0.05)
+    publisher.publish(1, "paper", {"paper_id": 1})
+    inherited = publisher._thread
+    # What a pool child sees after the fork: a thread object its process does not run.
+    publisher._pid = -1
+
+    publisher.publish(1, "paper", {"paper_id": 2})
+    assert publisher._thread is not inherited and publisher._thread.is_alive()
+    _wait_for(lambda: len(_stream(client, 1)) == 2)
+
+
+def test_failing_run_keeps_its_unsaved_stage():
+    db = SessionLocal()
+    try:
+        user = User(email=f"pubsub-{uuid4()}@example.com", password_hash="x")
+        db.add(user)
+        db.commit()
+        project = Project(user_id=user.id, topic="write-behind", config={})
+        db.add(project)
+        db.commit()
+        service = PipelineService(db, publisher=BufferedEventPublisher(None))
+        service.stage_commit_interval = 3600
+        service.update_stage(project, "DOWNLOAD", 40)  # committed: the first stage write
+        service.update_stage(project, "EMBED", 70)  # waits for the next commit
+
+        service.fail(project, "provider unavailable")
+        other = SessionLocal()
+        try:
+            stored = other.get(Project, project.id)
+            assert (stored.status, stored.stage, stored.progress) == ("failed", "EMBED", 70)
+        finally:
+            other.close()
+    finally:
+        db.rollback()
+        db.query(Project).filter(Project.user_id == user.id).delete(synchronize_session=False)
+        db.query(User).filter(User.id == user.id).delete(synchronize_session=False)
+        db.commit()
+        db.close()
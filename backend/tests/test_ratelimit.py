@@ -0,0 +1,69 @@
+import threading
+
+import fakeredis
+import pytest
+
+from infrastructure.llm import MockLLMProvider
+from infrastructure.ratelimit import RateLimitedLLMProvider, RateLimitTimeout, TokenBucketLimiter
+
+
+def _limiter(max_wait=0.05):
+    return TokenBucketLimiter(fakeredis.FakeRedis(), max_wait=max_wait)
+
+
+def test_request_bucket_admits_up_to_the_limit():
+    limiter = _limiter()
+    limiter.acquire("llm:a", 2, 0, 10)
+    limiter.acquire("llm:a", 2, 0, 10)
+    with pytest.raises(RateLimitTimeout):
+        limiter.acquire("llm:a", 2, 0, 10)
+    limiter.acquire("llm:b", 2, 0, 10)  # buckets are per provider
+
+
+def test_settle_refunds_overestimated_tokens():
+    limiter = _limiter()
+    limiter.acquire("embed", 0, 100, 80)
+    with pytest.raises(RateLimitTimeout):
+        limiter.acquire("embed", 0, 100, 30)
+    limiter.settle("embed", estimated=80, actual=20)
+    limiter.acquire("embed", 0, 100, 30)
+
+
+class RecordingLimiter:
+    def __init__(self):
+        self.settled = []
+        self._lock = threading.Lock()
+
+    def acquire(self, name, rpm, tpm, tokens):
+        pass
+
+    def settle(self, name, estimated, actual):
+        with self._lock:
+            self.settled.append(actual)
+
+
+class OverlappingLLM(MockLLMProvider):
+    """Charges len(prompt) tokens, with every call in flight at the same time."""
+
+    def __init__(self):
+        self.barrier = threading.Barrier(4)
+
+    def generate_structured(self, prompt, schema):
+        self.barrier.wait(timeout=5)
+        self.record_usage(len(prompt))
+        self.barrier.wait(timeout=5)
+        return {}
+
+
+def test_concurrent_calls_settle_their_own_usage():
+    limiter = RecordingLimiter()
+    provider = RateLimitedLLMProvider(OverlappingLLM(), limiter, "llm", 60, 1000, completion_tokens=0)
+    threads = [
+        threading.Thread(target=provider.generate_structured, args=("a" * size, {})) for size in (10, 20, 30, 40)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(limiter.settled) == [10, 20, 30, 40]
+    assert provider.total_tokens == 100
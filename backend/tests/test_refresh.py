@@ -0,0 +1,162 @@
+from dataclasses import replace
+from datetime import datetime
+from uuid import uuid4
+
+from db.session import SessionLocal
+from infrastructure.arxiv import ArxivAdapter, MockArxivAdapter
+from infrastructure.llm import MockLLMProvider
+from models import Project, User
+from services.pipeline import REFRESH, PipelineService, report_sections
+
+
+class RevisingArxivAdapter(ArxivAdapter):
+    """Reports a new version of the cs.CL mock paper."""
+
+    def search(self, query, start, max_results, updated_since=None):
+        results = MockArxivAdapter().search(query, start, max_results)
+        return [
+            replace(meta, abstract="Revised abstract", updated_at=datetime(2099, 1, 1))
+            for meta in results
+            if meta.categories == ["cs.CL"]
+        ]
+
+
+class MovingArxivAdapter(ArxivAdapter):
+    """The mock papers and a second cs.CL one; with ``moved``, only a revision filing it under cs.AI."""
+
+    def __init__(self, moved=False):
+        self.moved = moved
+
+    def search(self, query, start, max_results, updated_since=None):
+        results = MockArxivAdapter().search(query, start, max_results)
+        extra = replace(results[1], arxiv_id="3456.7890", title="Third Mock Paper")
+        if self.moved:
+            return [replace(extra, categories=["cs.AI"], updated_at=datetime(2099, 1, 1))]
+        return results + [extra]
+
+
+class BrokenPdfArxivAdapter(MockArxivAdapter):
+    def fetch_pdf(self, paper):
+        raise ConnectionError("pdf unavailable")
+
+
+class FailingLLM(MockLLMProvider):
+    def generate_structured(self, prompt, schema):
+        raise RuntimeError("provider unavailable")
+
+
+class CountingLLM(MockLLMProvider):
+    def __init__(self):
+        self.calls = []
+
+    def generate_structured(self, prompt, schema):
+        self.calls.append("extract")
+        return super().generate_structured(prompt, schema)
+
+    def write_markdown(self, outline, evidence):
+        self.calls.append(outline)
+        return super().write_markdown(outline, evidence)
+
+
+def test_refresh_processes_only_new_or_revised_papers():
+    db = SessionLocal()
+    try:
+        user = User(email=f"refresh-{uuid4()}@example.com", password_hash="x")
+        db.add(user)
+        db.commit()
+        project = Project(user_id=user.id, topic="watch", config={"search": {"max_results": 2}})
+        db.add(project)
+        db.commit()
+
+        PipelineService(db).run(project)
+        assert project.last_success_at is not None
+        assert set(report_sections(project.report_markdown)) == {"cs.AI", "cs.CL"}
+        unchanged = report_sections(project.report_markdown)["cs.AI"]
+
+        project.run_mode = REFRESH
+        llm = CountingLLM()
+        PipelineService(db, llm_provider=llm).run(project)
+        assert llm.calls == []
+
+        PipelineService(db, arxiv_adapter=RevisingArxivAdapter(), llm_provider=llm).run(project)
+        assert llm.calls == ["extract", "Overview for watch: cs.CL"]
+        sections = report_sections(project.report_markdown)
+        assert sections["cs.AI"] == unchanged
+        assert "Revised abstract" in sections["cs.CL"]
+        db.delete(project)
+        db.commit()
+    finally:
+        db.close()
+
+
+def test_full_run_retries_papers_that_failed_before():
+    db = SessionLocal()
+    try:
+        user = User(email=f"retry-{uuid4()}@example.com", password_hash="x")
+        db.add(user)
+        db.commit()
+        project = Project(user_id=user.id, topic="retry", config={"search": {"max_results": 2}})
+        db.add(project)
+        db.commit()
+
+        PipelineService(db, llm_provider=FailingLLM()).run(project)
+        # The downloads succeeded; only the extraction failed.
+        outcomes = [(paper.download_status, paper.failed_stage, len(paper.analyses)) for paper in project.papers]
+        assert outcomes == [("ok", "EXTRACT", 0)] * 2
+
+        PipelineService(db, arxiv_adapter=BrokenPdfArxivAdapter()).run(project)
+        outcomes = [(paper.download_status, paper.failed_stage, len(paper.analyses)) for paper in project.papers]
+        assert outcomes == [("failed", "DOWNLOAD", 0)] * 2
+
+        PipelineService(db).run(project)
+        outcomes = [(paper.download_status, paper.failed_stage, len(paper.analyses)) for paper in project.papers]
+        assert outcomes == [("ok", None, 1)] * 2
+    finally:
+        db.close()
+
+
+def test_refresh_rewrites_the_section_a_revised_paper_left():
+    db = SessionLocal()
+    try:
+        user = User(email=f"refresh-{uuid4()}@example.com", password_hash="x")
+        db.add(user)
+        db.commit()
+        project = Project(user_id=user.id, topic="watch", config={"search": {"max_results": 2}})
+        db.add(project)
+        db.commit()
+        PipelineService(db, arxiv_adapter=MovingArxivAdapter()).run(project)
+
+        project.run_mode = REFRESH
+        llm = CountingLLM()
+        PipelineService(db, arxiv_adapter=MovingArxivAdapter(moved=True), llm_provider=llm).run(project)
+        assert llm.calls == ["extract", "Overview for watch: cs.AI", "Overview for watch: cs.CL"]
+        db.delete(project)
+        db.commit()
+    finally:
+        db.close()
+
+
+def test_refresh_retries_a_revision_that_failed():
+    db = SessionLocal()
+    try:
+        user = User(email=f"refresh-{uuid4()}@example.com", password_hash="x")
+        db.add(user)
+        db.commit()
+        project = Project(user_id=user.id, topic="watch", config={"search": {"max_results": 2}})
+        db.add(project)
+        db.commit()
+        PipelineService(db).run(project)
+
+        project.run_mode = REFRESH
+        PipelineService(db, arxiv_adapter=RevisingArxivAdapter(), llm_provider=FailingLLM()).run(project)
+        assert sorted(str(paper.failed_stage) for paper in project.papers) == ["EXTRACT", "None"]
+
+        # Nothing new on arXiv, but the failed revision is processed again.
+        llm = CountingLLM()
+        PipelineService(db, llm_provider=llm).run(project)
+        assert llm.calls == ["extract", "Overview for watch: cs.CL"]
+        assert "Revised abstract" in report_sections(project.report_markdown)["cs.CL"]
+        db.delete(project)
+        db.commit()
+    finally:
+        db.close()
@@ -0,0 +1,30 @@
+from core.config import Settings
+from infrastructure.embedding import MockEmbeddingProvider
+from infrastructure.llm import MockLLMProvider, OpenAICompatLLMProvider
+from infrastructure.registry import ProviderRegistry
+from schemas import ProjectCreate
+
+
+def test_registry_reuses_instances_per_configuration():
+    registry = ProviderRegistry()
+    registry.warm_up()
+    kwargs = registry.for_project({"providers": {"llm": {"name": "mock"}, "embedding": {"name": "mock"}}})
+    assert isinstance(kwargs["llm_provider"].inner, MockLLMProvider)
+    assert isinstance(kwargs["embed_provider"].inner, MockEmbeddingProvider)
+    assert kwargs["llm_provider"] is registry.llm()
+    assert registry.for_project(None)["embed_provider"] is kwargs["embed_provider"]
+
+    first = registry.llm({"name": "openai", "model": "a"})
+    assert isinstance(first.inner, OpenAICompatLLMProvider)
+    assert registry.llm({"name": "openai", "model": "a"}) is first
+    assert registry.llm({"name": "openai", "model": "b"}) is not first
+    registry.close()
+
+
+def test_settings_apply_unless_the_project_overrides_them():
+    registry = ProviderRegistry(Settings(llm_provider="openai", openai_base_url="http://llm.invalid"))
+    config = {"providers": ProjectCreate(topic="t").providers.dict()}
+    assert isinstance(registry.for_project(config)["llm_provider"].inner, OpenAICompatLLMProvider)
+    config["providers"]["llm"] = {"name": "mock", "model": None}
+    assert isinstance(registry.for_project(config)["llm_provider"].inner, MockLLMProvider)
+    registry.close()
@@ -0,0 +1,162 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+
+from core.config import get_settings
+from db.session import SessionLocal
+from models import Project, User
+from services.scheduler import (
+    LANES,
+    choose_lane,
+    dispatch_pending,
+    queue_status,
+    reap_stale_runs,
+    request_batch_run,
+)
+from workers.celery_app import run_batch_task, run_pipeline_task
+
+
+def _project(db, user, status, lane, minutes_ago, max_results=5):
+    project = Project(
+        user_id=user.id,
+        topic="scheduling",
+        config={"search": {"max_results": max_results}, "runtime": {"max_papers": max_results}},
+        status=status,
+        priority=LANES[lane],
+        run_requested_at=datetime.utcnow() - timedelta(minutes=minutes_ago),
+    )
+    db.add(project)
+    db.commit()
+    return project
+
+
+def test_choose_lane_by_size_and_request():
+    small = Project(config={"search": {"max_results": 5}})
+    large = Project(config={"search": {"max_results": 500}, "runtime": {"max_papers": 500}})
+    assert choose_lane(small) == "interactive"
+    assert choose_lane(large) == "bulk"
+    assert choose_lane(small, "bulk") == "bulk"
+
+
+def test_queue_position_counts_higher_lanes_and_own_runs():
+    db = SessionLocal()
+    try:
+        user = User(email=f"sched-{uuid4()}@example.com", password_hash="x")
+        other = User(email=f"sched-{uuid4()}@example.com", password_hash="x")
+        db.add_all([user, other])
+        db.commit()
+        _project(db, other, "scheduled", "interactive", minutes_ago=1)
+        _project(db, other, "scheduled", "bulk", minutes_ago=30)
+        _project(db, user, "running", "bulk", minutes_ago=60)
+        mine = _project(db, user, "pending", "bulk", minutes_ago=10)
+
+        info = queue_status(db, mine)
+        assert info["lane"] == "bulk"
+        # interactive run, the older bulk run and the owner's running run
+        assert info["queue_position"] == 3
+        assert info["eta_seconds"] is not None
+    finally:
+        db.rollback()
+        db.query(Project).filter(Project.user_id.in_([user.id, other.id])).delete(synchronize_session=False)
+        db.query(User).filter(User.id.in_([user.id, other.id])).delete(synchronize_session=False)
+        db.commit()
+        db.close()
+
+
+def test_lost_runs_release_their_slot():
+    settings = get_settings()
+    db = SessionLocal()
+    try:
+        user = User(email=f"sched-{uuid4()}@example.com", password_hash="x")
+        db.add(user)
+        db.commit()
+        lease_expired = datetime.utcnow() - timedelta(seconds=settings.celery_visibility_timeout + 60)
+        never_picked_up = datetime.utcnow() - timedelta(seconds=settings.scheduled_run_timeout + 60)
+        stuck = _project(db, user, "running", "bulk", minutes_ago=600)
+        waiting = _project(db, user, "scheduled", "bulk", minutes_ago=600)
+        lost = _project(db, user, "scheduled", "bulk", minutes_ago=600)
+        alive = _project(db, user, "running", "bulk", minutes_ago=1)
+        for project, updated_at in ((stuck, lease_expired), (waiting, lease_expired), (lost, never_picked_up)):
+            project.updated_at = updated_at
+        db.commit()
+
+        assert sorted(reap_stale_runs(db, user.id)) == sorted([stuck.id, lost.id])
+        db.expire_all()
+        assert (stuck.status, lost.status) == ("failed", "failed")
+        assert stuck.finished_at is not None
+        # A bulk run queued behind other work keeps its slot past the lease.
+        assert (waiting.status, alive.status) == ("scheduled", "running")
+        # A message of a reaped run that is delivered late does nothing.
+        assert run_pipeline_task.apply(args=(lost.id,)).get() == "not scheduled"
+    finally:
+        db.rollback()
+        db.query(Project).filter(Project.user_id == user.id).delete(synchronize_session=False)
+        db.query(User).filter(User.id == user.id).delete(synchronize_session=False)
+        db.commit()
+        db.close()
+
+
+def test_dispatch_returns_runs_to_the_queue_when_the_broker_fails(monkeypatch):
+    def broker_down(*_args, **_kwargs):
+        raise ConnectionError("broker unavailable")
+
+    db = SessionLocal()
+    try:
+        user = User(email=f"sched-{uuid4()}@example.com", password_hash="x")
+        db.add(user)
+        db.commit()
+        first = _project(db, user, "pending", "bulk", minutes_ago=10)
+        second = _project(db, user, "pending", "bulk", minutes_ago=5)
+        monkeypatch.setattr(run_pipeline_task, "apply_async", broker_down)
+
+        with pytest.raises(ConnectionError):
+            dispatch_pending(db, user.id)
+        db.expire_all()
+        assert (first.status, second.status) == ("pending", "pending")
+    finally:
+        db.rollback()
+        db.query(Project).filter(Project.user_id == user.id).delete(synchronize_session=False)
+        db.query(User).filter(User.id == user.id).delete(synchronize_session=False)
+        db.commit()
+        db.close()
+
+
+def test_batch_waits_for_one_slot_and_runs_as_one_task(monkeypatch):
+    sent = []
+
+    def record(args, priority=None):
+        sent.append(args[0])
+        return SimpleNamespace(id="batch-task")
+
+    db = SessionLocal()
+    try:
+        user = User(email=f"sched-{uuid4()}@example.com", password_hash="x")
+        db.add(user)
+        db.commit()
+        busy = [_project(db, user, "running", "bulk", minutes_ago=1) for _ in range(2)]
+        batch = [_project(db, user, "completed", "bulk", minutes_ago=1) for _ in range(3)]
+        monkeypatch.setattr(run_batch_task, "apply_async", record)
+
+        assert request_batch_run(db, batch) is None
+        assert [project.status for project in batch] == ["pending"] * 3
+        assert sent == []
+
+        busy[0].status = "completed"
+        db.commit()
+        task_ids = dispatch_pending(db, user.id)
+        assert sent == [[project.id for project in batch]]
+        assert task_ids == {project.id: "batch-task" for project in batch}
+        db.expire_all()
+        assert [project.status for project in batch] == ["scheduled"] * 3
+        # Running alongside the other run, the batch fills the second slot.
+        later = _project(db, user, "pending", "interactive", minutes_ago=0)
+        assert dispatch_pending(db, user.id) == {}
+        assert queue_status(db, later)["queue_position"] == 2
+    finally:
+        db.rollback()
+        db.query(Project).filter(Project.user_id == user.id).delete(synchronize_session=False)
+        db.query(User).filter(User.id == user.id).delete(synchronize_session=False)
+        db.commit()
+        db.close()